@@ -34,4 +34,4 @@ print("\n📝 Nächste Schritte:")
 print("1. Prüfe die neue Datei 'heilkraeuter_db_erweitert.json'")
 print("2. Wenn alles ok ist, ersetze die alte Datei:")
 print("   mv heilkraeuter_db_erweitert.json heilkraeuter_db.json")
-print("3. Starte die App neu: streamlit run app.py")
\ No newline at end of file
+print("3. Eine laufende App lädt die Datenbank nach wenigen Sekunden automatisch neu")
\ No newline at end of file
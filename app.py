@@ -1,13 +1,16 @@
 import streamlit as st
 import streamlit.components.v1 as components
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import json
 import os
-from PIL import Image
-import requests
-import base64
-from io import BytesIO
+from concurrent import futures
 import datetime
-import hashlib
+import bilder
+import datenbank
+import karten
+import plantnet
+from erntekalender import SYMBOLE
+from suche import AUSSCHLUSSGRUPPEN, GATTUNG, MONATE
 
 # Seitenkonfiguration mit SEO
 st.set_page_config(
@@ -81,25 +84,55 @@ components.html(f"""
 """, height=0)
 
 # Custom Event Tracking für Plausible
-def track_plausible_event(event_name, props=None):
-    """Track custom events in Plausible Analytics"""
-    if props:
-        props_json = json.dumps(props).replace('"', '\\"')
-        components.html(f"""
-        <script>
-        if (window.plausible) {{
-            window.plausible('{event_name}', {{props: {props_json}}});
-        }}
-        </script>
-        """, height=0)
-    else:
-        components.html(f"""
-        <script>
-        if (window.plausible) {{
-            window.plausible('{event_name}');
-        }}
-        </script>
-        """, height=0)
+# Events werden pro Session vorgemerkt und gesammelt in einem einzigen
+# unsichtbaren Component gesendet, höchstens einem pro Rerun
+def track_plausible_event(event_name, props=None, zustand=None):
+    """Merkt ein Plausible-Event vor, sofern sich sein Zustand geändert hat
+    
+    `zustand` legt fest, wann das Event erneut zählt (Standard: die Props).
+    Ein Rerun ohne neue Auswahl löst so kein weiteres Event aus.
+    """
+    if zustand is None:
+        zustand = json.dumps(props, sort_keys=True)
+    gesendet = st.session_state.setdefault('plausible_zustand', {})
+    if gesendet.get(event_name) == zustand:
+        return
+    gesendet[event_name] = zustand
+    st.session_state.setdefault('plausible_warteschlange', []).append((event_name, props))
+
+def vergiss_plausible_event(event_name):
+    """Auswahl zurückgesetzt: die nächste gleiche Auswahl zählt wieder"""
+    st.session_state.setdefault('plausible_zustand', {}).pop(event_name, None)
+
+def sende_plausible_events(seitenende=False):
+    """Sendet alle vorgemerkten Events in einem Component
+    
+    Während eines ganzen Seitenlaufs wird erst am Seitenende gesendet;
+    bei Fragment-Reruns am Ende der jeweiligen Section.
+    """
+    warteschlange = st.session_state.get('plausible_warteschlange')
+    if not warteschlange:
+        return
+    ctx = get_script_run_ctx()
+    if not seitenende and not (ctx and ctx.fragment_ids_this_run):
+        return
+    st.session_state.plausible_warteschlange = []
+    
+    aufrufe = []
+    for event_name, props in warteschlange:
+        argumente = json.dumps(event_name)
+        if props:
+            argumente += ", " + json.dumps({'props': props})
+        aufrufe.append(f"window.plausible({argumente});")
+    # "</" würde das Script-Tag vorzeitig schliessen (Props enthalten Suchtext)
+    skript = "\n".join(aufrufe).replace("</", "<\\/")
+    components.html(f"""
+    <script>
+    if (window.plausible) {{
+        {skript}
+    }}
+    </script>
+    """, height=0)
 
 # Custom CSS für besseres Design + SEO
 st.markdown("""
@@ -212,144 +245,220 @@ st.markdown("""
         }
     }
 </style>
-""", unsafe_allow_html=True)
+""" + f"<style>{karten.CSS}</style>", unsafe_allow_html=True)
 
-# Daten laden
-@st.cache_data
-def lade_pflanzen():
-    with open('heilkraeuter_db.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        return data['pflanzen'] if 'pflanzen' in data else data
+# Daten laden: ein schreibgeschützter Stand pro Prozess, geteilt von allen Sessions.
+# Der Watcher tauscht ihn aus, sobald heilkraeuter_db.json ersetzt wird.
+@st.cache_resource
+def starte_datenbank():
+    return datenbank.DatenbankWatcher().starte()
 
-pflanzen = lade_pflanzen()
+# Einmal pro Rerun holen, damit der ganze Durchlauf denselben Stand sieht
+db = starte_datenbank().aktuell
+index = db.index
 
 # Hilfsfunktionen für Suche
 def get_alle_symptome():
-    symptome = set()
-    for pflanze in pflanzen:
-        symptome.update(pflanze['symptome'])
-    return sorted(list(symptome))
+    return list(index.alle_symptome)
 
 def get_alle_wirkungen():
-    wirkungen = set()
-    for pflanze in pflanzen:
-        wirkungen.update(pflanze['wirkung'])
-    return sorted(list(wirkungen))
+    return list(index.alle_wirkungen)
 
 def get_alle_pflanzennamen():
-    return sorted([p['deutsch'] for p in pflanzen])
+    return list(index.alle_pflanzennamen)
 
 def suche_nach_symptom(symptom):
-    return [p for p in pflanzen if symptom in p['symptome']]
+    return index.nach_symptom(symptom)
 
 def suche_nach_wirkung(wirkung):
-    return [p for p in pflanzen if wirkung in p['wirkung']]
+    return index.nach_wirkung(wirkung)
 
 def suche_pflanze(name):
-    for p in pflanzen:
-        if p['deutsch'].lower() == name.lower():
+    for p in db.pflanzen:
+        if p.deutsch.lower() == name.lower():
             return p
-    return None
+    # Kein exakter Treffer: tippfehlertolerant über deutsche und lateinische Namen
+    return db.unscharf.beste_pflanze(name)
+
+def suche_symptom_unscharf(text):
+    treffer = db.unscharf.suche(text, arten=('symptom',), limit=1)
+    return treffer[0][2] if treffer else None
 
 def suche_nach_lateinischem_namen(latin_name):
-    """Sucht Pflanze nach lateinischem Namen (case-insensitive, flexibel)"""
-    latin_name = latin_name.lower().strip()
-    
-    for p in pflanzen:
-        pflanze_latin = p['lateinisch'].lower()
-        
-        if pflanze_latin == latin_name:
-            return p
-        
-        if pflanze_latin.split()[0:2] == latin_name.split()[0:2]:
-            return p
-            
-        if pflanze_latin.startswith(latin_name.split()[0]):
-            return p
-    
-    return None
+    """Sucht Pflanze nach lateinischem Namen: (Spezifität, Pflanze), bester Treffer zuerst"""
+    return db.namen.beste(latin_name)
 
 def suche_nach_erntezeit(monat):
-    return [p for p in pflanzen if monat in p.get('erntemonate', [])]
+    return db.kalender.nach_monat(monat)
 
 # Pl@ntNet API Integration
-def identify_plant_with_plantnet(image_file, api_key):
+# Identifikationen laufen auf einem Thread-Pool (max. 4 gleichzeitig pro Prozess),
+# Ergebnisse werden pro Bild-Hash gecacht (plantnet_cache.sqlite)
+@st.cache_resource
+def lade_erkennungsdienst():
+    return plantnet.Erkennungsdienst()
+
+@st.fragment(run_every=1.0)
+def warte_auf_erkennung():
+    """Fragt den laufenden Auftrag jede Sekunde ab, ohne die ganze Seite neu auszuführen"""
+    auftrag = st.session_state.erkennung['auftrag']
+    if auftrag.fertig:
+        st.rerun()
+    
+    st.markdown("### 🔍 Identifikation läuft...")
+    st.progress(min(auftrag.dauer / 20, 0.95), text=f"Pflanze wird analysiert... ({auftrag.dauer:.0f} s)")
+    if st.button("✖️ Abbrechen", key="erkennung_abbrechen"):
+        auftrag.abbrechen()
+        st.rerun()
+
+def hole_erkennung(uploaded_file, api_key):
+    """Auftrag für das aktuelle Foto aus dem Session State, bei neuem Foto neu gestartet"""
+    erkennung = st.session_state.get('erkennung')
+    if erkennung is not None and erkennung['upload'] == uploaded_file.file_id:
+        return erkennung
+    
+    if erkennung is not None and erkennung['auftrag'] is not None:
+        erkennung['auftrag'].abbrechen()
+    
+    erkennung = {'upload': uploaded_file.file_id, 'auftrag': None, 'ergebnis': None, 'fehler': None}
     try:
-        
-        url = "https://my-api.plantnet.org/v2/identify/all"
-        
-        image = Image.open(image_file)
-        
-        if image.mode == 'RGBA':
-            background = Image.new('RGB', image.size, (255, 255, 255))
-            background.paste(image, mask=image.split()[3])
-            image = background
-        elif image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        buffered = BytesIO()
-        image.save(buffered, format="JPEG", quality=85)
-        buffered.seek(0)
-        
-        params = {'api-key': api_key}
-        files = [('images', ('plant.jpg', buffered, 'image/jpeg'))]
-        data = {'organs': ['auto']}
-        
-        response = requests.post(url, params=params, files=files, data=data)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            st.error(f"API Fehler: {response.status_code} - {response.text}")
-            return None
-            
-    except Exception as e:
-        st.error(f"Fehler bei der Pflanzenerkennung: {str(e)}")
+        erkennung['auftrag'] = lade_erkennungsdienst().starte(uploaded_file.getvalue(), api_key)
+        # Cache-Treffer sind sofort fertig und brauchen keine Polling-Runde
+        futures.wait([erkennung['auftrag'].future], timeout=0.5)
+    except plantnet.PlantNetFehler as e:
+        erkennung['fehler'] = str(e)
+    st.session_state.erkennung = erkennung
+    return erkennung
+
+@st.fragment(run_every=1.0)
+def warte_auf_stapel():
+    """Fortschritt des laufenden Stapels, ohne die ganze Seite neu auszuführen"""
+    stapel = st.session_state.stapel['auftrag']
+    if stapel.fertig:
+        st.rerun()
+    
+    st.progress(stapel.erledigt / stapel.anzahl, text=f"{stapel.erledigt} von {stapel.anzahl} analysiert... ({stapel.dauer:.0f} s)")
+    if st.button("✖️ Abbrechen", key="stapel_abbrechen"):
+        stapel.abbrechen()
+        st.rerun()
+
+def treffer_zeile(treffer):
+    """Pl@ntNet-Treffer als Tabellenzeile, abgeglichen mit der Datenbank"""
+    species_name = treffer['species']['scientificNameWithoutAuthor']
+    stufe, matched_plant = suche_nach_lateinischem_namen(species_name)
+    if matched_plant is None:
+        in_db = "—"
+    elif stufe == GATTUNG:
+        in_db = f"🌱 Gattung wie {matched_plant.deutsch}"
+    else:
+        in_db = f"✨ {matched_plant.deutsch}"
+    return {'Pl@ntNet': species_name, 'Übereinstimmung': treffer['score'] * 100, 'In der Datenbank': in_db}
+
+# Bild-Manifest (static/bilder/): Originale werden beim Start einmal erfasst,
+# fehlende Varianten im Hintergrund erzeugt
+@st.cache_resource
+def starte_bildkatalog(db_version):
+    return bilder.BildKatalog().baue_im_hintergrund()
+
+bildkatalog = starte_bildkatalog(db.version)
+
+# Breite der Bildspalte in Pflanzenkarten (1/3 des Layouts)
+KARTEN_BILDBREITE = 480
+
+# Fertig kodierte Bildbytes, geteilt von allen Sessions
+@st.cache_resource
+def lade_bildcache():
+    return bilder.BildCache()
+
+bildcache = lade_bildcache()
+
+# Bild-URLs: "app/static/bilder" = Streamlit Static Serving (siehe .streamlit/config.toml),
+# die Adresse von bildserver.py / CDN, oder leer = über Streamlits Media-Manager (URL pro Session)
+BILD_URL_BASIS = os.environ.get("PHYTOS_BILD_URL", bilder.STATIC_URL)
+
+# Fertige HTML-Karten, geteilt von allen Sessions
+@st.cache_resource
+def lade_kartencache():
+    return karten.KartenCache()
+
+kartencache = lade_kartencache()
+
+def karten_bild(pflanze, breite=KARTEN_BILDBREITE):
+    """(URL, Breite, Höhe) der Variante für die Karte, oder None ohne URL-Basis bzw. Variante"""
+    if not BILD_URL_BASIS:
         return None
+    url = bildkatalog.url(pflanze.bild, breite, basis=BILD_URL_BASIS)
+    if url is None:
+        return None
+    return (url, *bildkatalog.abmessungen(pflanze.bild, breite))
+
+def zeige_bild(pflanze, breite=KARTEN_BILDBREITE):
+    """Zeigt das Pflanzenfoto über den Media-Manager, solange es keine Varianten-URL gibt"""
+    original = bildkatalog.original(pflanze.bild)
+    if original is None:
+        st.info("📷 Bild nicht verfügbar")
+        return
+    
+    # Noch keine Varianten: Original verwenden (wird einmal als JPEG kodiert und gecacht)
+    pfad = bildkatalog.variante(pflanze.bild, breite) or pflanze.bild
+    daten = bildcache.hole(pfad, original['hash'])
+    
+    if daten:
+        st.image(daten, width="stretch", caption=pflanze.deutsch)
+    else:
+        st.info("📷 Bild nicht verfügbar")
+
+def zeige_karte(pflanze, stufe, bild=None):
+    st.markdown(kartencache.karte(pflanze, stufe, db.version, bild), unsafe_allow_html=True)
+
+# Ergebnislisten: so viele Zeilen pro Seite bzw. pro "Weitere anzeigen"
+SEITENGROESSE = int(os.environ.get("PHYTOS_SEITENGROESSE", "10"))
+
+def zeige_ergebnisliste(ergebnisse, schluessel, stufe=karten.DETAILS):
+    """Zeigt Treffer als kompakte, aufklappbare Zeilen, seitenweise
+    
+    Eine Seite ist ein einziges Element; "Weitere anzeigen" hängt die
+    nächste an. Eine neue Trefferliste beginnt wieder bei der ersten Seite.
+    """
+    kennung = tuple(pflanze.id for pflanze in ergebnisse)
+    zustand = f"{schluessel}_seiten"
+    if st.session_state.get(zustand, (None, 0))[0] != kennung:
+        st.session_state[zustand] = (kennung, 1)
+    seiten = st.session_state[zustand][1]
+    
+    for seite in range(seiten):
+        zeilen = []
+        for pflanze in ergebnisse[seite * SEITENGROESSE:(seite + 1) * SEITENGROESSE]:
+            bild = None if stufe == karten.UEBERSICHT else karten_bild(pflanze)
+            zeilen.append(kartencache.karte(pflanze, stufe, db.version, bild, zeile=True))
+        st.markdown("".join(zeilen), unsafe_allow_html=True)
+    
+    gezeigt = min(seiten * SEITENGROESSE, len(ergebnisse))
+    if gezeigt < len(ergebnisse):
+        st.caption(f"{gezeigt} von {len(ergebnisse)} Pflanzen")
+        st.button(
+            f"⬇️ Weitere {min(SEITENGROESSE, len(ergebnisse) - gezeigt)} anzeigen",
+            key=f"{schluessel}_mehr",
+            on_click=lambda: st.session_state.update({zustand: (kennung, seiten + 1)})
+        )
 
 def zeige_pflanze(pflanze, show_details=False):
-    """Zeigt eine Pflanze mit allen Details an"""
+    """Zeigt eine Pflanze mit allen Details an, als ein einziges Element"""
+    stufe = karten.DETAILS if show_details else karten.KURZ
+    bild = karten_bild(pflanze)
+    
+    if bild or bildkatalog.original(pflanze.bild) is None:
+        zeige_karte(pflanze, stufe, bild)
+        return
     
+    # Ohne Varianten-URL: Foto über st.image neben der Karte
     col1, col2 = st.columns([1, 2])
     
     with col1:
-        # Verwende bild-Pfad aus JSON statt deutschen Namen
-        if 'bild' in pflanze and pflanze['bild']:
-            image_path = pflanze['bild']
-            if os.path.exists(image_path):
-                try:
-                    img = Image.open(image_path)
-                    st.image(img, use_column_width=True, caption=pflanze['deutsch'])
-                except Exception as e:
-                    st.info("📷 Bild nicht verfügbar")
-            else:
-                st.info("📷 Bild nicht verfügbar")
-        else:
-            st.info("📷 Bild nicht verfügbar")
+        zeige_bild(pflanze)
     
     with col2:
-        st.subheader(f"🌿 {pflanze['deutsch']}")
-        st.markdown(f"*{pflanze['lateinisch']}*")
-        st.markdown(f"**🩺 Symptome:** {', '.join(pflanze['symptome'])}")
-        st.markdown(f"**💊 Wirkungen:** {', '.join(pflanze['wirkung'])}")
-        
-        if show_details:
-            st.markdown("---")
-            st.markdown("**📋 Anwendung & Zubereitung:**")
-            st.markdown(f"{pflanze['zubereitung']}")
-            
-            st.markdown("---")
-            st.markdown("**🌸 Erntezeit & Vorkommen:**")
-            st.markdown(f"**Blüte/Erntezeit:** {pflanze['bluete_erntezeit']}")
-            if 'erntemonate' in pflanze:
-                st.markdown(f"**Erntemonate:** {', '.join(pflanze['erntemonate'])}")
-            st.markdown(f"**Vorkommen:** {pflanze['vorkommen']}")
-            st.markdown(f"**Als Nahrungsmittel:** {pflanze['nahrungsmittel']}")
-            
-            st.markdown("---")
-            st.markdown("**⚠️ Sicherheitshinweise:**")
-            st.markdown(f"**Nebenwirkungen:** {pflanze['nebenwirkungen']}")
-            st.markdown(f"**Kontraindikationen:** {pflanze['kontraindikationen']}")
+        zeige_karte(pflanze, stufe)
 
 # Header mit SEO-Content - klickbar für Zurück zum Start
 st.markdown("""
@@ -425,6 +534,16 @@ with st.expander("ℹ️ Über diese Datenbank - Jetzt lesen!"):
 
 st.markdown("---")
 
+def abschnitt(titel, schluessel, inhalt):
+    """Aufklappbare Section, deren Inhalt nur gebaut wird, solange sie offen ist
+    
+    `inhalt` ist ein Fragment: Widgets darin führen nur die eigene Section
+    neu aus, nicht die ganze Seite.
+    """
+    with st.expander(titel, expanded=False, key=schluessel, on_change="rerun") as bereich:
+        if bereich.open:
+            inhalt()
+
 # Accordion-Style Navigation - Single Page mit aufklappbaren Sections
 st.markdown("""
 <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
@@ -441,7 +560,8 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # 🔍 SECTION 1: Nach Symptom suchen
-with st.expander("🔍 **Nach Symptom suchen**", expanded=False):
+@st.fragment
+def abschnitt_symptom():
     st.header("Suche nach Symptom")
     st.markdown("*Wähle ein Symptom, um passende Heilpflanzen zu finden*")
     
@@ -450,6 +570,18 @@ with st.expander("🔍 **Nach Symptom suchen**", expanded=False):
         options=["---"] + get_alle_symptome(),
         key="symptom_select"
     )
+    symptom_text = st.text_input(
+        "...oder Symptom eintippen:",
+        placeholder="z.B. Kopfschmerz, Husten, Schlafstörung",
+        key="symptom_text"
+    )
+    
+    if symptom == "---" and symptom_text.strip():
+        symptom = suche_symptom_unscharf(symptom_text) or "---"
+        if symptom != "---":
+            st.caption(f"🔤 Meintest du: **{symptom}**")
+        else:
+            st.warning("Kein passendes Symptom gefunden.")
     
     if symptom != "---":
         # Track custom event
@@ -459,14 +591,19 @@ with st.expander("🔍 **Nach Symptom suchen**", expanded=False):
         if ergebnisse:
             st.success(f"**{len(ergebnisse)} Pflanze(n) gefunden für '{symptom}':**")
             
-            for pflanze in ergebnisse:
-                st.markdown("---")
-                zeige_pflanze(pflanze, show_details=True)
+            zeige_ergebnisliste(ergebnisse, "symptom")
         else:
             st.warning("Keine Pflanzen gefunden.")
+    else:
+        vergiss_plausible_event("Symptom Search")
+    
+    sende_plausible_events()
+
+abschnitt("🔍 **Nach Symptom suchen**", "abschnitt_symptom", abschnitt_symptom)
 
 # 💊 SECTION 2: Nach Wirkung suchen
-with st.expander("💊 **Nach Wirkung suchen**", expanded=False):
+@st.fragment
+def abschnitt_wirkung():
     st.header("Suche nach Wirkung")
     st.markdown("*Finde Heilpflanzen mit bestimmten pharmakologischen Wirkungen*")
     
@@ -484,14 +621,19 @@ with st.expander("💊 **Nach Wirkung suchen**", expanded=False):
         if ergebnisse:
             st.success(f"**{len(ergebnisse)} Pflanze(n) gefunden mit Wirkung '{wirkung}':**")
             
-            for pflanze in ergebnisse:
-                st.markdown("---")
-                zeige_pflanze(pflanze, show_details=True)
+            zeige_ergebnisliste(ergebnisse, "wirkung")
         else:
             st.warning("Keine Pflanzen gefunden.")
+    else:
+        vergiss_plausible_event("Wirkung Search")
+    
+    sende_plausible_events()
+
+abschnitt("💊 **Nach Wirkung suchen**", "abschnitt_wirkung", abschnitt_wirkung)
 
 # 🌿 SECTION 3: Nach Pflanze suchen
-with st.expander("🌿 **Nach Pflanze suchen**", expanded=False):
+@st.fragment
+def abschnitt_pflanze():
     st.header("Suche nach Pflanze")
     st.markdown("*Detaillierte Informationen zu einzelnen Heilpflanzen*")
     
@@ -500,6 +642,20 @@ with st.expander("🌿 **Nach Pflanze suchen**", expanded=False):
         options=["---"] + get_alle_pflanzennamen(),
         key="pflanze_select"
     )
+    pflanze_text = st.text_input(
+        "...oder Namen eintippen (deutsch oder lateinisch):",
+        placeholder="z.B. Kamile, Urtica dioica",
+        key="pflanze_text"
+    )
+    
+    if pflanze_name == "---" and pflanze_text.strip():
+        pflanze = suche_pflanze(pflanze_text.strip())
+        if pflanze:
+            pflanze_name = pflanze.deutsch
+            if pflanze_name.lower() != pflanze_text.strip().lower():
+                st.caption(f"🔤 Meintest du: **{pflanze_name}**")
+        else:
+            st.warning("Keine passende Pflanze gefunden.")
     
     if pflanze_name != "---":
         # Track custom event
@@ -508,14 +664,108 @@ with st.expander("🌿 **Nach Pflanze suchen**", expanded=False):
         pflanze = suche_pflanze(pflanze_name)
         if pflanze:
             zeige_pflanze(pflanze, show_details=True)
+    else:
+        vergiss_plausible_event("Plant View")
+    
+    sende_plausible_events()
+
+abschnitt("🌿 **Nach Pflanze suchen**", "abschnitt_pflanze", abschnitt_pflanze)
+
+# 🔎 SECTION 3b: Freitextsuche
+@st.fragment
+def abschnitt_volltext():
+    st.header("Freitextsuche")
+    st.markdown("*Durchsucht Namen, Anwendung, Vorkommen und Sicherheitshinweise aller Pflanzen*")
+
+    suchtext = st.text_input(
+        "Suchbegriff:",
+        placeholder="z.B. Gurgeln, Schwangerschaft, feuchte Standorte",
+        key="volltext_input"
+    )
+
+    if suchtext.strip():
+        # Track custom event
+        track_plausible_event("Fulltext Search", {"query": suchtext.strip()[:50]})
+
+        # Alle Treffer: die Ergebnisliste blättert selbst
+        ergebnisse = db.volltext.suche(suchtext, limit=None)
+        if ergebnisse:
+            st.success(f"**{len(ergebnisse)} Pflanze(n) gefunden für '{suchtext.strip()}':**")
+
+            zeige_ergebnisliste([pflanze for score, pflanze in ergebnisse], "volltext")
+        else:
+            st.warning("Keine Pflanzen gefunden.")
+    else:
+        vergiss_plausible_event("Fulltext Search")
+    
+    sende_plausible_events()
+
+abschnitt("🔎 **Freitextsuche**", "abschnitt_volltext", abschnitt_volltext)
+
+# 🧪 SECTION 3c: Erweiterte Suche
+@st.fragment
+def abschnitt_erweitert():
+    st.header("Erweiterte Suche")
+    st.markdown("*Kombiniere Symptome, Wirkungen und Erntemonate und schliesse ungeeignete Pflanzen aus*")
+
+    col_s, col_w = st.columns(2)
+    with col_s:
+        such_symptome = st.multiselect("Symptome:", get_alle_symptome(), key="erweitert_symptome")
+    with col_w:
+        such_wirkungen = st.multiselect("Wirkungen:", get_alle_wirkungen(), key="erweitert_wirkungen")
+
+    verknuepfung = st.radio(
+        "Symptome und Wirkungen verknüpfen:",
+        options=["Alle müssen zutreffen", "Mindestens eines"],
+        horizontal=True,
+        key="erweitert_verknuepfung"
+    )
+
+    col_m, col_a = st.columns(2)
+    with col_m:
+        such_monate = st.multiselect("Erntbar in:", MONATE, key="erweitert_monate")
+    with col_a:
+        such_ausschluesse = st.multiselect(
+            "Ausschliessen bei:",
+            list(AUSSCHLUSSGRUPPEN),
+            help="Pflanzen mit entsprechenden Kontraindikationen oder Nebenwirkungen werden ausgeblendet",
+            key="erweitert_ausschluesse"
+        )
+
+    if such_symptome or such_wirkungen or such_monate or such_ausschluesse:
+        # Track custom event
+        track_plausible_event("Advanced Search", {
+            "criteria": len(such_symptome) + len(such_wirkungen) + len(such_monate),
+            "exclusions": len(such_ausschluesse)
+        })
+
+        ergebnisse = db.bitsets.abfrage(
+            symptome=such_symptome,
+            wirkungen=such_wirkungen,
+            monate=such_monate,
+            ausschliessen=such_ausschluesse,
+            alle=verknuepfung == "Alle müssen zutreffen"
+        )
+        if ergebnisse:
+            st.success(f"**{len(ergebnisse)} Pflanze(n) gefunden:**")
+
+            zeige_ergebnisliste(ergebnisse, "erweitert")
+        else:
+            st.warning("Keine Pflanzen erfüllen alle Kriterien.")
+    else:
+        vergiss_plausible_event("Advanced Search")
+    
+    sende_plausible_events()
+
+abschnitt("🧪 **Erweiterte Suche**", "abschnitt_erweitert", abschnitt_erweitert)
 
 # 📅 SECTION 4: Nach Erntezeit suchen
-with st.expander("📅 **Nach Erntezeit suchen**", expanded=False):
+@st.fragment
+def abschnitt_erntezeit():
     st.header("Suche nach Erntezeit")
     st.markdown("*Finde heraus, welche Heilkräuter gerade Saison haben*")
     
-    monate = ["Januar", "Februar", "März", "April", "Mai", "Juni", 
-              "Juli", "August", "September", "Oktober", "November", "Dezember"]
+    monate = MONATE
     aktueller_monat = monate[datetime.datetime.now().month - 1]
     
     monat = st.selectbox(
@@ -528,45 +778,41 @@ with st.expander("📅 **Nach Erntezeit suchen**", expanded=False):
     # Track custom event
     track_plausible_event("Harvest Search", {"month": monat})
     
+    ganzes_jahr = st.toggle("Ganzes Jahr anzeigen", key="kalender_ganzes_jahr")
+    
     ergebnisse = suche_nach_erntezeit(monat)
     
-    if ergebnisse:
-        st.success(f"**{len(ergebnisse)} Pflanze(n) im {monat} verfügbar:**")
-        for pflanze in ergebnisse:
-            st.markdown("---")
-            zeige_pflanze(pflanze, show_details=True)
+    if ergebnisse or ganzes_jahr:
+        if not ganzes_jahr:
+            st.success(f"**{len(ergebnisse)} Pflanze(n) im {monat} verfügbar:**")
+        # Ganze Matrix Pflanzen × Monate als ein einziges Tabellen-Element
+        st.dataframe(
+            db.kalender.tabelle(None if ganzes_jahr else monat),
+            hide_index=True,
+            width="stretch"
+        )
+        st.caption("  ".join(f"{symbol} {teil}" for teil, symbol in SYMBOLE.items()))
     else:
         st.info(f"Keine Pflanzen für {monat} in der Datenbank.")
+    
+    sende_plausible_events()
+
+abschnitt("📅 **Nach Erntezeit suchen**", "abschnitt_erntezeit", abschnitt_erntezeit)
 
 # 📚 SECTION 5: Alle Pflanzen
-with st.expander("📚 **Alle Pflanzen anzeigen**", expanded=False):
+@st.fragment
+def abschnitt_alle():
     st.header("Alle Pflanzen (Übersicht)")
-    st.markdown(f"*Gesamte Datenbank: {len(pflanzen)} wissenschaftlich belegte Heilpflanzen*")
+    st.markdown(f"*Gesamte Datenbank: {len(db.pflanzen)} wissenschaftlich belegte Heilpflanzen*")
     
-    for pflanze in pflanzen:
-        st.markdown("---")
-        st.markdown(f"### 🌿 {pflanze['deutsch']}")
-        st.markdown(f"*{pflanze['lateinisch']}*")
-        
-        col3, col4 = st.columns(2)
-        
-        with col3:
-            st.markdown(f"**🩺 Symptome:** {', '.join(pflanze['symptome'])}")
-            st.markdown(f"**💊 Wirkungen:** {', '.join(pflanze['wirkung'])}")
-            st.markdown(f"**📋 Zubereitung:** {pflanze['zubereitung']}")
-        
-        with col4:
-            st.markdown(f"**🌸 Blüte/Erntezeit:** {pflanze['bluete_erntezeit']}")
-            if 'erntemonate' in pflanze:
-                st.markdown(f"**📅 Erntemonate:** {', '.join(pflanze['erntemonate'])}")
-            st.markdown(f"**📍 Vorkommen:** {pflanze['vorkommen']}")
-            st.markdown(f"**🍴 Als Nahrungsmittel:** {pflanze['nahrungsmittel']}")
-        
-        st.markdown(f"**⚠️ Nebenwirkungen:** {pflanze['nebenwirkungen']}")
-        st.markdown(f"**🚫 Kontraindikationen:** {pflanze['kontraindikationen']}")
+    # Übersicht ohne Fotos, seitenweise
+    zeige_ergebnisliste(db.pflanzen, "alle", stufe=karten.UEBERSICHT)
+
+abschnitt("📚 **Alle Pflanzen anzeigen**", "abschnitt_alle", abschnitt_alle)
 
 # 📸 SECTION 6: Pflanze erkennen
-with st.expander("📸 **Pflanze erkennen (KI)**", expanded=False):
+@st.fragment
+def abschnitt_erkennung():
     st.header("📸 Pflanze erkennen")
     st.markdown("""
     Lade ein Foto einer Pflanze hoch und die App versucht, sie zu identifizieren.
@@ -605,107 +851,190 @@ with st.expander("📸 **Pflanze erkennen (KI)**", expanded=False):
         
         if not api_key:
             st.warning("⚠️ Bitte gib deinen Pl@ntNet API Key ein, um fortzufahren.")
-            st.stop()
+            return
     
     st.markdown("---")
-    st.markdown("### 📤 Foto hochladen")
     
-    uploaded_file = st.file_uploader(
-        "Wähle ein Pflanzenfoto:",
-        type=['jpg', 'jpeg', 'png'],
-        help="Unterstützte Formate: JPG, PNG"
-    )
+    # Tageskontingent: bei knappem Rest nur noch Einzelfotos, Cache-Treffer gehen immer
+    kontingent = lade_erkennungsdienst().kontingent
+    kontingent_rest = kontingent.rest(api_key)
+    kontingent_knapp = kontingent.knapp(api_key)
+    if kontingent_rest <= 0:
+        st.warning("⏳ Das heutige Pl@ntNet-Kontingent ist aufgebraucht. Bereits erkannte Fotos werden weiterhin angezeigt, neue ab morgen.")
+    elif kontingent_knapp:
+        st.info(f"📉 Heute nur noch ca. {kontingent_rest} Erkennungen übrig – der Stapel-Modus pausiert bis morgen.")
+    else:
+        st.caption(f"📊 Heute noch ca. {kontingent_rest} von {kontingent.pro_tag} Erkennungen verfügbar")
     
-    if uploaded_file is not None:
-        # Track image upload event
-        track_plausible_event("Image Upload", {"feature": "plant_recognition"})
-        
-        col1, col2 = st.columns([1, 1])
+    tab_einzeln, tab_stapel = st.tabs(["📷 Ein Foto", "🗂️ Mehrere Fotos"])
+    
+    with tab_einzeln:
+        st.markdown("### 📤 Foto hochladen")
         
-        with col1:
-            st.image(uploaded_file, caption="Hochgeladenes Bild", use_column_width=True)
+        uploaded_file = st.file_uploader(
+            "Wähle ein Pflanzenfoto:",
+            type=['jpg', 'jpeg', 'png'],
+            help="Unterstützte Formate: JPG, PNG"
+        )
         
-        with col2:
-            st.markdown("### 🔍 Identifikation läuft...")
+        if uploaded_file is not None:
+            # Track image upload event
+            track_plausible_event("Image Upload", {"feature": "plant_recognition"}, zustand=uploaded_file.file_id)
             
-            with st.spinner("Pflanze wird analysiert..."):
-                result = identify_plant_with_plantnet(uploaded_file, api_key)
+            col1, col2 = st.columns([1, 1])
             
-            if result and 'results' in result:
-                st.success("✅ Identifikation abgeschlossen!")
-                
-                st.markdown("---")
-                st.markdown("### 🌿 Gefundene Pflanzen:")
+            with col1:
+                st.image(uploaded_file, caption="Hochgeladenes Bild", width="stretch")
+            
+            with col2:
+                erkennung = hole_erkennung(uploaded_file, api_key)
+                auftrag = erkennung['auftrag']
                 
-                for i, plant in enumerate(result['results'][:5], 1):
-                    score = plant['score'] * 100
-                    species_name = plant['species']['scientificNameWithoutAuthor']
-                    common_names = plant['species'].get('commonNames', [])
+                if auftrag is not None and auftrag.abgebrochen:
+                    st.info("✖️ Identifikation abgebrochen.")
+                    if st.button("🔄 Erneut versuchen", key="erkennung_neu"):
+                        del st.session_state.erkennung
+                        st.rerun()
+                elif auftrag is not None and not auftrag.fertig:
+                    warte_auf_erkennung()
+                else:
+                    # Ergebnis einmal abholen und in der Session behalten
+                    if auftrag is not None and erkennung['ergebnis'] is None and erkennung['fehler'] is None:
+                        try:
+                            erkennung['ergebnis'] = auftrag.ergebnis()
+                        except ValueError as e:
+                            erkennung['fehler'] = f"Bild kann nicht verwendet werden: {e}."
+                        except plantnet.PlantNetFehler as e:
+                            erkennung['fehler'] = f"Fehler bei der Pflanzenerkennung: {e}."
+                    result = erkennung['ergebnis']
                     
-                    matched_plant = suche_nach_lateinischem_namen(species_name)
-                    
-                    st.markdown("---")
-                    st.markdown(f"### #{i} - {species_name}")
-                    st.markdown(f"**Übereinstimmung:** {score:.1f}%")
-                    st.progress(score / 100)
-                    
-                    if common_names:
-                        st.markdown(f"**Volksnamen:** {', '.join(common_names[:3])}")
-                    
-                    if matched_plant:
-                        st.success("✨ Diese Pflanze ist in unserer Heilkräuter-Datenbank!")
-                        st.markdown("---")
+                    if result and 'results' in result:
+                        st.success("✅ Identifikation abgeschlossen!")
                         
-                        col_a, col_b = st.columns([1, 2])
+                        st.markdown("---")
+                        st.markdown("### 🌿 Gefundene Pflanzen:")
                         
-                        with col_a:
-                            # Verwende bild-Pfad aus JSON
-                            if 'bild' in matched_plant and matched_plant['bild']:
-                                image_path = matched_plant['bild']
-                                if os.path.exists(image_path):
-                                    try:
-                                        img = Image.open(image_path)
-                                        st.image(img, use_column_width=True, caption=matched_plant['deutsch'])
-                                    except Exception as e:
-                                        st.info("📷 Bild nicht verfügbar")
+                        for i, plant in enumerate(result['results'][:5], 1):
+                            score = plant['score'] * 100
+                            species_name = plant['species']['scientificNameWithoutAuthor']
+                            common_names = plant['species'].get('commonNames', [])
+                            
+                            stufe, matched_plant = suche_nach_lateinischem_namen(species_name)
+                            
+                            kopf = f"---\n### #{i} - {species_name}\n**Übereinstimmung:** {score:.1f}%"
+                            st.markdown(kopf)
+                            st.progress(score / 100)
+                            
+                            if common_names:
+                                st.markdown(f"**Volksnamen:** {', '.join(common_names[:3])}")
+                            
+                            if matched_plant:
+                                if stufe == GATTUNG:
+                                    st.info(f"🌱 Gleiche Gattung wie *{matched_plant.lateinisch}* aus unserer Heilkräuter-Datenbank")
                                 else:
-                                    st.info("📷 Bild nicht verfügbar")
+                                    st.success("✨ Diese Pflanze ist in unserer Heilkräuter-Datenbank!")
+                                zeige_pflanze(matched_plant, show_details=True)
                             else:
-                                st.info("📷 Bild nicht verfügbar")
-                        
-                        with col_b:
-                            st.subheader(f"🌿 {matched_plant['deutsch']}")
-                            st.markdown(f"*{matched_plant['lateinisch']}*")
-                            st.markdown(f"**🩺 Symptome:** {', '.join(matched_plant['symptome'])}")
-                            st.markdown(f"**💊 Wirkungen:** {', '.join(matched_plant['wirkung'])}")
-                        
-                        st.markdown("---")
-                        st.markdown("**📋 Anwendung & Zubereitung:**")
-                        st.markdown(f"- **Zubereitung:** {matched_plant['zubereitung']}")
-                        
-                        st.markdown("**🌸 Erntezeit & Vorkommen:**")
-                        st.markdown(f"- **Blüte/Erntezeit:** {matched_plant['bluete_erntezeit']}")
-                        if 'erntemonate' in matched_plant:
-                            st.markdown(f"- **Erntemonate:** {', '.join(matched_plant['erntemonate'])}")
-                        st.markdown(f"- **Vorkommen:** {matched_plant['vorkommen']}")
-                        st.markdown(f"- **Als Nahrungsmittel:** {matched_plant['nahrungsmittel']}")
-                        
-                        st.markdown("**⚠️ Sicherheitshinweise:**")
-                        st.markdown(f"- **Nebenwirkungen:** {matched_plant['nebenwirkungen']}")
-                        st.markdown(f"- **Kontraindikationen:** {matched_plant['kontraindikationen']}")
+                                    st.info("ℹ️ Diese Pflanze ist nicht in unserer Heilkräuter-Datenbank.")
+                                    st.markdown(f"*Möglicherweise keine dokumentierte Heilwirkung für europäische Phytotherapie.*")
+                    
+                    elif result:
+                        st.warning("⚠️ Keine Pflanzen erkannt. Versuche ein anderes Foto.")
                     else:
-                            st.info("ℹ️ Diese Pflanze ist nicht in unserer Heilkräuter-Datenbank.")
-                            st.markdown(f"*Möglicherweise keine dokumentierte Heilwirkung für europäische Phytotherapie.*")
+                        st.error(f"❌ {erkennung['fehler'] or 'Fehler bei der Identifikation.'} Bitte versuche es erneut.")
+                        if st.button("🔄 Erneut versuchen", key="erkennung_neu"):
+                            del st.session_state.erkennung
+                            st.rerun()
+        else:
+            vergiss_plausible_event("Image Upload")
+
+    
+    with tab_stapel:
+        st.markdown("### 🗂️ Mehrere Fotos hochladen")
+        st.markdown(f"Z.B. alle Fotos eines Kräuterspaziergangs, bis zu {plantnet.STAPEL_MAX_FOTOS} Stück.")
+        
+        stapel_dateien = st.file_uploader(
+            "Wähle Pflanzenfotos:",
+            type=['jpg', 'jpeg', 'png'],
+            accept_multiple_files=True,
+            key="stapel_upload",
+            help="Unterstützte Formate: JPG, PNG"
+        )
+        gruppiert = st.checkbox(
+            f"📎 Alle Fotos zeigen dieselbe Pflanze (max. {plantnet.MAX_ORGANE})",
+            key="stapel_gruppiert",
+            help="Blatt, Blüte, Frucht usw. einer Pflanze werden gemeinsam in einer Anfrage ausgewertet"
+        )
+        parallel = st.slider(
+            "Gleichzeitige Anfragen:", 1, 4, plantnet.STAPEL_PARALLEL,
+            key="stapel_parallel",
+            disabled=gruppiert
+        )
+        
+        if st.button("🔍 Alle identifizieren", key="stapel_start",
+                     disabled=not stapel_dateien or (kontingent_knapp and not gruppiert)):
+            if 'stapel' in st.session_state:
+                st.session_state.stapel['auftrag'].abbrechen()
+            try:
+                auftrag = lade_erkennungsdienst().starte_stapel(
+                    [datei.getvalue() for datei in stapel_dateien], api_key, gruppiert, parallel
+                )
+                st.session_state.stapel = {
+                    'auftrag': auftrag,
+                    'namen': [datei.name for datei in stapel_dateien],
+                    'gruppiert': gruppiert,
+                }
+                track_plausible_event("Batch Upload", {"fotos": len(stapel_dateien), "gruppiert": gruppiert}, zustand=id(auftrag))
+            except plantnet.PlantNetFehler as e:
+                st.error(f"❌ {e}")
+        
+        stapel = st.session_state.get('stapel')
+        if stapel is not None and not stapel['auftrag'].fertig:
+            warte_auf_stapel()
+        elif stapel is not None:
+            auftrag = stapel['auftrag']
+            if auftrag.abgebrochen:
+                st.info("✖️ Abgebrochen – bereits analysierte Fotos stehen in der Tabelle.")
             
-            elif result:
-                st.warning("⚠️ Keine Pflanzen erkannt. Versuche ein anderes Foto.")
+            zeilen = []
+            if stapel['gruppiert']:
+                ergebnis = auftrag.ergebnisse[0]
+                if ergebnis:
+                    for i, treffer in enumerate(ergebnis.get('results', [])[:5], 1):
+                        zeilen.append({'Rang': i, **treffer_zeile(treffer)})
+                if auftrag.fehler[0]:
+                    st.error(f"❌ {auftrag.fehler[0]}")
             else:
-                st.error("❌ Fehler bei der Identifikation. Bitte versuche es erneut.")
+                for name, ergebnis, fehler in zip(stapel['namen'], auftrag.ergebnisse, auftrag.fehler):
+                    if ergebnis and ergebnis.get('results'):
+                        zeile = treffer_zeile(ergebnis['results'][0])
+                    else:
+                        zeile = {'Pl@ntNet': "—", 'Übereinstimmung': None, 'In der Datenbank': "—"}
+                    hinweis = fehler or ("" if ergebnis else "nicht gesendet")
+                    zeilen.append({'Foto': name, **zeile, 'Hinweis': hinweis})
+            
+            if zeilen:
+                in_db = sum(1 for z in zeilen if z['In der Datenbank'] != "—")
+                einheit = "Treffer" if stapel['gruppiert'] else "Fotos"
+                st.success(f"✅ {len(zeilen)} {einheit}, davon {in_db} in unserer Heilkräuter-Datenbank")
+                st.dataframe(
+                    zeilen,
+                    hide_index=True,
+                    width="stretch",
+                    column_config={
+                        'Übereinstimmung': st.column_config.ProgressColumn(
+                            "Übereinstimmung", format="%.0f%%", min_value=0, max_value=100
+                        ),
+                    }
+                )
+    
+    sende_plausible_events()
 
+abschnitt("📸 **Pflanze erkennen (KI)**", "abschnitt_erkennung", abschnitt_erkennung)
 
 # 📖 SECTION 7: Anwendungs-Guide
-with st.expander("📖 **Anwendungs-Guide**", expanded=False):
-    
+@st.fragment
+def abschnitt_guide():
     st.header("📖 Anwendungs-Guide für Heilkräuter")
     st.markdown("*Praktisches Wissen für die sichere Anwendung zu Hause*")
     
@@ -858,7 +1187,7 @@ with st.expander("📖 **Anwendungs-Guide**", expanded=False):
     - Bei chronischen Erkrankungen immer ärztliche Begleitung
     
     ### Korbblütler-Allergie
-    **Vorsicht bei:** Kamille, Arnika, Ringelblume, Schafgarbe  
+    **Vorsicht bei:** Kamille, Arnika, Ringelblume, Schafgarbe, Löwenzahn, Goldrute, Klette  
     **Test:** Kleine Menge trinken, 24h warten  
     **Bei Allergie:** Diese Pflanzen meiden!
     """)
@@ -871,6 +1200,8 @@ with st.expander("📖 **Anwendungs-Guide**", expanded=False):
     richtige Anwendung ist entscheidend!
     """)
 
+abschnitt("📖 **Anwendungs-Guide**", "abschnitt_guide", abschnitt_guide)
+
 # Info-Box mit Statistiken
 st.markdown("---")
 st.markdown("""
@@ -921,4 +1252,7 @@ st.caption("""
 für Phytotherapie, Institut für Komplementärmedizin (Universität Zürich), Agroscope
 
 **Pflanzenerkennung:** Powered by Pl@ntNet API | **Datenbank:** {} Heilpflanzen | **Stand:** Februar 2026
-""".format(len(pflanzen)))
\ No newline at end of file
+""".format(len(db.pflanzen)))
+
+# Plausible-Events dieses Seitenlaufs in einem Component senden
+sende_plausible_events(seitenende=True)
@@ -0,0 +1,360 @@
+"""
+Bild-Varianten für die Pflanzenfotos
+
+Aus jedem Original in images/ werden verkleinerte WebP- und JPEG-Varianten
+erzeugt (Vorschau, Karte, Vollbild) und in einem Manifest verzeichnet. Die
+App wählt daraus die kleinste Variante, die für die Anzeige reicht, statt
+das mehrere MB grosse PNG auszuliefern.
+
+Die Dateinamen enthalten den Hash ihres Inhalts und ändern sich nie. Der
+Ordner liegt unter static/, damit Streamlit (oder bildserver.py bzw. ein
+CDN) die Varianten direkt und dauerhaft cachebar ausliefern kann.
+
+Das Manifest verzeichnet auch jedes Original (Endung, Abmessungen, Grösse,
+Hash). Es wird einmal beim Start bzw. im Build-Schritt erstellt; danach
+fragt niemand mehr das Dateisystem, ob ein Bild existiert.
+
+`bereite_upload_vor` verkleinert hochgeladene Fotos für die Pflanzenerkennung.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+BILDER_ORDNER = 'images'
+# Streamlit liefert static/ unter app/static/ aus (server.enableStaticServing)
+VARIANTEN_ORDNER = os.path.join('static', 'bilder')
+STATIC_URL = 'app/static/bilder'
+MANIFEST_PFAD = os.path.join(VARIANTEN_ORDNER, 'manifest.json')
+MANIFEST_VERSION = 3
+
+BILD_ENDUNGEN = ('.png', '.jpg', '.jpeg', '.webp')
+
+# Variante -> maximale Kantenlänge in Pixeln (aufsteigend)
+VARIANTEN = {
+    'vorschau': 200,
+    'karte': 480,
+    'voll': 1200,
+}
+
+# Format -> (Pillow-Format, Dateiendung, Speicheroptionen)
+FORMATE = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Uploads für Pl@ntNet: längere Kanten bringen keine bessere Erkennung
+UPLOAD_MAX_KANTE = 1280
+UPLOAD_MAX_BYTES = 25 * 1024 * 1024
+UPLOAD_MAX_PIXEL = 60_000_000
+# MPO = JPEG mit Zusatzbildern, wie es manche Handykameras schreiben
+UPLOAD_FORMATE = ('JPEG', 'MPO', 'PNG', 'WEBP')
+
+
+def datei_hash(pfad):
+    h = hashlib.sha256()
+    with open(pfad, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _ohne_transparenz(bild):
+    """JPEG kennt keinen Alphakanal: auf weissen Hintergrund legen"""
+    if bild.mode in ('RGBA', 'LA', 'P'):
+        bild = bild.convert('RGBA')
+        hintergrund = Image.new('RGB', bild.size, (255, 255, 255))
+        hintergrund.paste(bild, mask=bild.split()[3])
+        return hintergrund
+    return bild.convert('RGB') if bild.mode != 'RGB' else bild
+
+
+def erzeuge_varianten(quelle, ziel_ordner=VARIANTEN_ORDNER):
+    """Schreibt alle Varianten eines Originals und gibt den Manifest-Eintrag zurück"""
+    stamm = os.path.splitext(os.path.basename(quelle))[0]
+    eintrag = {}
+
+    with Image.open(quelle) as original:
+        bild = ImageOps.exif_transpose(original)
+        bild = _ohne_transparenz(bild)
+
+        # Von gross nach klein verkleinern: jeder Schritt startet vom vorherigen
+        for variante, kante in sorted(VARIANTEN.items(), key=lambda v: -v[1]):
+            bild.thumbnail((kante, kante), Image.LANCZOS)
+            dateien = {}
+            for format_name, (pil_format, endung, optionen) in FORMATE.items():
+                puffer = BytesIO()
+                bild.save(puffer, pil_format, **optionen)
+                daten = puffer.getvalue()
+                # Inhalts-Hash im Namen: die URL einer Variante ändert sich nie
+                inhalt_hash = hashlib.sha256(daten).hexdigest()[:12]
+                datei = f"{stamm}-{variante}-{inhalt_hash}.{endung}"
+                pfad = os.path.join(ziel_ordner, datei)
+                with open(pfad, 'wb') as f:
+                    f.write(daten)
+                dateien[format_name] = {'pfad': pfad, 'datei': datei, 'bytes': len(daten)}
+            eintrag[variante] = {'breite': bild.width, 'hoehe': bild.height, **dateien}
+
+    return eintrag
+
+
+def lade_manifest(pfad=MANIFEST_PFAD):
+    try:
+        with open(pfad, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('bilder', {})
+
+
+def schreibe_manifest(bilder, pfad=MANIFEST_PFAD):
+    tmp_pfad = f"{pfad}.tmp"
+    with open(tmp_pfad, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'bilder': bilder}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_pfad, pfad)
+
+
+def _original(pfad, stat):
+    """Manifest-Eintrag eines Originals; liest nur den Bild-Header, nicht die Pixel"""
+    with Image.open(pfad) as bild:
+        breite, hoehe = bild.size
+    return {
+        'hash': datei_hash(pfad),
+        'endung': os.path.splitext(pfad)[1].lower(),
+        'breite': breite,
+        'hoehe': hoehe,
+        'bytes': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+    }
+
+
+def erfasse_originale(ordner=BILDER_ORDNER, alt=None):
+    """Inventar aller Originale in `ordner`: {Pfad: Manifest-Eintrag}
+
+    Dateien mit unveränderter Grösse und mtime übernehmen den alten Eintrag
+    samt Varianten, ohne neu gehasht zu werden. Nicht lesbare Bilder fehlen.
+    """
+    alt = alt or {}
+    bilder = {}
+    try:
+        dateien = sorted(os.scandir(ordner), key=lambda d: d.name)
+    except OSError:
+        return bilder
+
+    for datei in dateien:
+        if not datei.is_file() or not datei.name.lower().endswith(BILD_ENDUNGEN):
+            continue
+        # Gleiche Schreibweise wie das Feld `bild` in der Datenbank
+        pfad = f"{ordner}/{datei.name}"
+        stat = datei.stat()
+        eintrag = alt.get(pfad)
+        if eintrag and eintrag.get('bytes') == stat.st_size and eintrag.get('mtime_ns') == stat.st_mtime_ns:
+            bilder[pfad] = eintrag
+            continue
+        try:
+            bilder[pfad] = _original(pfad, stat)
+        except Exception:
+            continue
+        if eintrag and eintrag.get('hash') == bilder[pfad]['hash'] and 'varianten' in eintrag:
+            bilder[pfad]['varianten'] = eintrag['varianten']
+    return bilder
+
+
+def _varianten_da(eintrag):
+    return 'varianten' in eintrag and all(
+        os.path.exists(varianten[f]['pfad'])
+        for varianten in eintrag['varianten'].values() for f in FORMATE
+    )
+
+
+def baue_varianten(bilder=None, ziel_ordner=VARIANTEN_ORDNER, manifest_pfad=MANIFEST_PFAD, melde=None):
+    """Erzeugt fehlende oder veraltete Varianten und schreibt das Manifest
+
+    Ohne `bilder` wird das Inventar aus images/ und dem alten Manifest erstellt.
+    """
+    os.makedirs(ziel_ordner, exist_ok=True)
+    if bilder is None:
+        bilder = erfasse_originale(alt=lade_manifest(manifest_pfad))
+    bilder = {quelle: dict(eintrag) for quelle, eintrag in bilder.items()}
+
+    for quelle, eintrag in bilder.items():
+        if _varianten_da(eintrag):
+            continue
+        eintrag['varianten'] = erzeuge_varianten(quelle, ziel_ordner)
+        if melde:
+            melde(quelle, eintrag)
+
+    schreibe_manifest(bilder, manifest_pfad)
+    _raeume_auf(ziel_ordner, bilder)
+    return bilder
+
+
+def _raeume_auf(ziel_ordner, bilder):
+    """Entfernt Varianten, die nicht mehr im Manifest stehen"""
+    behalten = {
+        varianten[f]['datei']
+        for eintrag in bilder.values() for varianten in eintrag.get('varianten', {}).values() for f in FORMATE
+    }
+    for datei in os.listdir(ziel_ordner):
+        if datei.endswith(tuple(f".{endung}" for _, endung, _ in FORMATE.values())) and datei not in behalten:
+            os.remove(os.path.join(ziel_ordner, datei))
+
+
+class BildKatalog:
+    """Hält das Manifest im Speicher und wählt passende Varianten aus
+
+    Beim Erstellen wird das Inventar der Originale einmal erfasst (bei
+    aktuellem Manifest nur ein Verzeichnis-Scan). `original` beantwortet
+    danach, ob und in welcher Grösse ein Bild vorliegt.
+
+    `baue_im_hintergrund` erzeugt fehlende Varianten in einem eigenen Thread;
+    bis dahin liefert `variante` None und die App zeigt das Original.
+    """
+
+    def __init__(self, manifest_pfad=MANIFEST_PFAD, ordner=BILDER_ORDNER):
+        self.manifest_pfad = manifest_pfad
+        self.bilder = erfasse_originale(ordner, lade_manifest(manifest_pfad))
+        self._thread = None
+
+    def baue_im_hintergrund(self):
+        def bauen():
+            try:
+                self.bilder = baue_varianten(self.bilder, manifest_pfad=self.manifest_pfad)
+            except Exception as e:
+                print(f"⚠️ Bild-Varianten konnten nicht erzeugt werden: {e}")
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=bauen, name="bild-varianten", daemon=True)
+            self._thread.start()
+        return self
+
+    def original(self, quelle):
+        """Manifest-Eintrag des Originals oder None, wenn es das Bild nicht gibt"""
+        return self.bilder.get(quelle) if quelle else None
+
+    def _passend(self, quelle, breite):
+        eintrag = self.bilder.get(quelle)
+        if not eintrag or 'varianten' not in eintrag:
+            return None
+        varianten = eintrag['varianten']
+        passend = None
+        for name in VARIANTEN:
+            passend = varianten[name]
+            if passend['breite'] >= breite:
+                break
+        return passend
+
+    def variante(self, quelle, breite, format_name='webp'):
+        """Pfad der kleinsten Variante, die mindestens `breite` Pixel breit ist"""
+        passend = self._passend(quelle, breite)
+        return passend[format_name]['pfad'] if passend else None
+
+    def abmessungen(self, quelle, breite):
+        """(Breite, Höhe) der Variante, die `variante` bzw. `url` wählt"""
+        passend = self._passend(quelle, breite)
+        return (passend['breite'], passend['hoehe']) if passend else None
+
+    def url(self, quelle, breite, basis=STATIC_URL, format_name='webp'):
+        """Unveränderliche URL der passenden Variante unter `basis`"""
+        passend = self._passend(quelle, breite)
+        return f"{basis.rstrip('/')}/{passend[format_name]['datei']}" if passend else None
+
+
+class BildCache:
+    """LRU-Cache fertig kodierter Bildbytes mit Obergrenze in Bytes
+
+    Schlüssel ist (Pfad, Hash des Originals laut Manifest), ein ersetztes
+    Bild wird also neu gelesen, ohne dass jeder Zugriff `stat` aufruft.
+    Varianten werden unverändert gelesen; Originale ohne Variante werden
+    einmal als JPEG kodiert. Für st.image ist ein Treffer damit ein
+    Dictionary-Zugriff statt Dekodieren und erneutem Kodieren.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.belegt = 0
+        self._eintraege = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lade(self, pfad):
+        if pfad.lower().endswith(('.webp', '.jpg', '.jpeg')):
+            with open(pfad, 'rb') as f:
+                return f.read()
+        with Image.open(pfad) as original:
+            bild = _ohne_transparenz(ImageOps.exif_transpose(original))
+            puffer = BytesIO()
+            bild.save(puffer, 'JPEG', quality=85)
+            return puffer.getvalue()
+
+    def hole(self, pfad, kennung):
+        """Kodierte Bytes des Bildes oder None, wenn es nicht lesbar ist"""
+        schluessel = (pfad, kennung)
+        with self._lock:
+            daten = self._eintraege.get(schluessel)
+            if daten is not None:
+                self._eintraege.move_to_end(schluessel)
+                return daten
+
+        try:
+            daten = self._lade(pfad)
+        except Exception:
+            return None
+
+        with self._lock:
+            if len(daten) <= self.max_bytes and schluessel not in self._eintraege:
+                self._eintraege[schluessel] = daten
+                self.belegt += len(daten)
+                while self.belegt > self.max_bytes:
+                    _, alt = self._eintraege.popitem(last=False)
+                    self.belegt -= len(alt)
+        return daten
+
+    def __len__(self):
+        return len(self._eintraege)
+
+
+def bereite_upload_vor(datei, max_kante=UPLOAD_MAX_KANTE):
+    """Hochgeladenes Foto -> verkleinertes JPEG (Bytes) für die Pflanzenerkennung
+
+    Grösse, Format und Abmessungen werden anhand des Headers geprüft, bevor
+    ein Pixel dekodiert wird; ungeeignete Dateien lösen ValueError aus.
+    JPEGs dekodiert `draft` direkt in verkleinerter Auflösung (1/2 bis 1/8),
+    danach werden EXIF-Drehung angewendet und die lange Kante begrenzt.
+    """
+    datei.seek(0, os.SEEK_END)
+    groesse = datei.tell()
+    datei.seek(0)
+    if groesse > UPLOAD_MAX_BYTES:
+        raise ValueError(f"Datei zu gross ({groesse / 1024 / 1024:.1f} MB, maximal {UPLOAD_MAX_BYTES // 1024 // 1024} MB)")
+
+    try:
+        bild = Image.open(datei)
+    except Exception:
+        raise ValueError("Datei ist kein lesbares Bild")
+
+    with bild:
+        if bild.format not in UPLOAD_FORMATE:
+            raise ValueError(f"Bildformat {bild.format} wird nicht unterstützt")
+        breite, hoehe = bild.size
+        if breite * hoehe > UPLOAD_MAX_PIXEL:
+            raise ValueError(f"Bild zu gross ({breite}×{hoehe} Pixel)")
+
+        if bild.format in ('JPEG', 'MPO'):
+            bild.draft('RGB', (max_kante, max_kante))
+        try:
+            bild = ImageOps.exif_transpose(bild)
+            bild.thumbnail((max_kante, max_kante), Image.LANCZOS)
+            bild = _ohne_transparenz(bild)
+        except Exception:
+            raise ValueError("Bild ist beschädigt oder unvollständig")
+
+        puffer = BytesIO()
+        bild.save(puffer, 'JPEG', quality=85)
+        return puffer.getvalue()
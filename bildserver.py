@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Mini-Server für die Bild-Varianten mit langlebigen Cache-Headern
+
+Die Varianten in static/bilder/ tragen den Inhalts-Hash im Namen und dürfen
+deshalb als "immutable" ausgeliefert werden: Browser und CDN laden ein Bild
+genau einmal. Streamlits eigene Static-Auslieferung setzt keine solchen
+Header.
+
+Verwendung:
+    python bildserver.py [PORT]
+    PHYTOS_BILD_URL=http://localhost:8502 streamlit run app.py
+"""
+
+import re
+import sys
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import bilder
+
+EIN_JAHR = 365 * 24 * 3600
+
+
+# "kamille-karte-6aeb79a51db3.webp": Variante mit Inhalts-Hash
+VARIANTE = re.compile(r'-[0-9a-f]{12}\.(webp|jpg)$')
+
+
+class BildHandler(SimpleHTTPRequestHandler):
+    status = None
+
+    def send_response(self, code, message=None):
+        self.status = code
+        super().send_response(code, message)
+
+    def end_headers(self):
+        pfad = urlsplit(self.path).path
+        # Nur vorhandene Varianten sind unveränderlich; Fehler (404) und das
+        # Manifest darf ein CDN nicht ein Jahr lang zwischenspeichern
+        if self.status in (200, 304) and VARIANTE.search(pfad):
+            self.send_header('Cache-Control', f'public, max-age={EIN_JAHR}, immutable')
+        else:
+            self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        super().end_headers()
+
+    def list_directory(self, path):
+        self.send_error(404, "Kein Verzeichnis-Listing")
+        return None
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8502
+    handler = partial(BildHandler, directory=bilder.VARIANTEN_ORDNER)
+    server = ThreadingHTTPServer(('', port), handler)
+    print(f"🖼️  Bildserver läuft auf http://localhost:{port} ({bilder.VARIANTEN_ORDNER})")
+    server.serve_forever()
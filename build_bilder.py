@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Build-Schritt: Erzeugt verkleinerte WebP- und JPEG-Varianten aller Pflanzenfotos
+
+Ergebnis liegt in static/bilder/ samt manifest.json, die Dateinamen
+enthalten den Inhalts-Hash. Das Manifest verzeichnet zudem jedes Original
+in images/ (Endung, Abmessungen, Grösse, Hash). Unveränderte Originale
+werden übersprungen.
+"""
+
+import bilder
+import datenbank
+
+print("Lade Datenbank...")
+pflanzen = datenbank.lade_pflanzen()
+quellen = sorted({p.bild for p in pflanzen if p.bild})
+print(f"📊 {len(quellen)} Bilder referenziert")
+print()
+
+
+def melde(quelle, eintrag):
+    groessen = ', '.join(
+        f"{name} {v['breite']}px ({v['webp']['bytes'] / 1024:.0f} KB)"
+        for name, v in eintrag['varianten'].items()
+    )
+    print(f"  🖼️  {quelle}: {groessen}")
+
+
+manifest = bilder.baue_varianten(melde=melde)
+
+original_bytes = sum(e['bytes'] for e in manifest.values())
+karte_bytes = sum(e['varianten']['karte']['webp']['bytes'] for e in manifest.values())
+fehlend = [q for q in quellen if q not in manifest]
+
+print()
+print(f"✅ {len(manifest)} Bilder im Manifest: {bilder.MANIFEST_PFAD}")
+print(f"   Originale:       {original_bytes / 1024 / 1024:.1f} MB")
+print(f"   Karten (WebP):   {karte_bytes / 1024 / 1024:.1f} MB")
+if fehlend:
+    print()
+    print(f"⚠️  {len(fehlend)} Bild(er) fehlen (siehe debug_images.py):")
+    for q in fehlend:
+        print(f"  - {q}")
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Build-Schritt: Kompiliert heilkraeuter_db.json in einen binären Snapshot
+
+Der Snapshot enthält Datensätze, Suchindizes und Vokabular und wird von der
+App beim Start direkt geladen, solange er zum Inhalt der JSON-Datei passt.
+"""
+
+import os
+import time
+
+import datenbank
+
+print("Kompiliere Datenbank...")
+start = time.perf_counter()
+with open(datenbank.DB_PFAD, 'rb') as f:
+    db = datenbank.baue_datenbank(f.read())
+datenbank.schreibe_snapshot(db)
+dauer = (time.perf_counter() - start) * 1000
+
+groesse_kb = os.path.getsize(datenbank.SNAPSHOT_PFAD) / 1024
+print(f"\n✅ Snapshot geschrieben: {datenbank.SNAPSHOT_PFAD} ({groesse_kb:.1f} KB, {dauer:.0f} ms)")
+print(f"   Pflanzen:   {len(db)}")
+print(f"   Vokabular:  {len(db.vokabular)} Begriffe")
+print(f"   Version:    {db.version[:12]}")
+
+start = time.perf_counter()
+geladen = datenbank.lade_snapshot(db.version)
+dauer = (time.perf_counter() - start) * 1000
+if geladen is None:
+    print("\n❌ Snapshot konnte nicht wieder geladen werden!")
+    exit(1)
+print(f"\n⚡ Ladezeit Snapshot: {dauer:.1f} ms")
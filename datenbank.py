@@ -0,0 +1,290 @@
+"""
+Laden der Heilkräuter-Datenbank
+
+Die Datenbank wird einmal pro Prozess geladen und danach nur noch gelesen.
+Alle Sessions teilen sich dieselben unveränderlichen Datensätze und Indizes.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+
+import erntekalender
+import suche
+from erntekalender import Erntekalender
+from suche import BitsetIndex, NamensAufloeser, PflanzenIndex, TrigrammIndex, Volltextindex
+
+DB_PFAD = 'heilkraeuter_db.json'
+SNAPSHOT_PFAD = 'heilkraeuter_db.snapshot'
+
+# Bei inkompatiblen Änderungen am Snapshot-Inhalt erhöhen (Änderungen am
+# Quelltext der Index-Module erkennt die Format-Kennung selbst)
+SNAPSHOT_VERSION = 1
+SNAPSHOT_MAGIC = b'PHYTOSDB'
+
+
+class Pflanze:
+    """Schreibgeschützter Datensatz einer Heilpflanze"""
+
+    __slots__ = (
+        'id', 'lateinisch', 'deutsch', 'symptome', 'wirkung', 'zubereitung',
+        'bluete_erntezeit', 'vorkommen', 'nebenwirkungen', 'kontraindikationen',
+        'nahrungsmittel', 'bild', 'erntemonate', 'synonyme', 'familie',
+    )
+
+    id: int
+    lateinisch: str
+    deutsch: str
+    symptome: tuple
+    wirkung: tuple
+    zubereitung: str
+    bluete_erntezeit: str
+    vorkommen: str
+    nebenwirkungen: str
+    kontraindikationen: str
+    nahrungsmittel: str
+    bild: str
+    erntemonate: tuple
+    synonyme: tuple
+    familie: str
+
+    def __init__(self, **felder):
+        for name in self.__slots__:
+            object.__setattr__(self, name, felder[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Pflanze ist schreibgeschützt")
+
+    def __reduce__(self):
+        return (_pflanze_aus_werten, (tuple(getattr(self, n) for n in self.__slots__),))
+
+    def __repr__(self):
+        return f"Pflanze({self.id}, {self.deutsch!r})"
+
+    @classmethod
+    def aus_json(cls, eintrag, vokabular):
+        """Erstellt einen Datensatz aus einem JSON-Eintrag der Datenbank"""
+        return cls(
+            id=eintrag['id'],
+            lateinisch=eintrag['lateinisch'],
+            deutsch=eintrag['deutsch'],
+            symptome=vokabular.liste(eintrag['symptome']),
+            wirkung=vokabular.liste(eintrag['wirkung']),
+            zubereitung=eintrag['zubereitung'],
+            bluete_erntezeit=eintrag['bluete_erntezeit'],
+            vorkommen=eintrag['vorkommen'],
+            nebenwirkungen=eintrag['nebenwirkungen'],
+            kontraindikationen=eintrag['kontraindikationen'],
+            nahrungsmittel=vokabular.wort(eintrag['nahrungsmittel']),
+            bild=eintrag.get('bild', ''),
+            erntemonate=vokabular.liste(eintrag.get('erntemonate', [])),
+            synonyme=tuple(eintrag.get('synonyme', [])),
+            familie=eintrag.get('familie', ''),
+        )
+
+
+def _pflanze_aus_werten(werte):
+    return Pflanze(**dict(zip(Pflanze.__slots__, werte)))
+
+
+class Vokabular:
+    """Interniert wiederkehrende Begriffe wie Symptome, Wirkungen und Monate"""
+
+    def __init__(self):
+        self.begriffe = {}
+
+    def wort(self, begriff):
+        return self.begriffe.setdefault(begriff, sys.intern(begriff))
+
+    def liste(self, begriffe):
+        return tuple(self.wort(b) for b in begriffe)
+
+    def __len__(self):
+        return len(self.begriffe)
+
+
+def _parse_json(inhalt):
+    data = json.loads(inhalt)
+    return data['pflanzen'] if 'pflanzen' in data else data
+
+
+def lade_pflanzen(pfad=DB_PFAD, vokabular=None):
+    """Lädt heilkraeuter_db.json als Liste von Pflanze-Datensätzen"""
+    if vokabular is None:
+        vokabular = Vokabular()
+    with open(pfad, 'rb') as f:
+        eintraege = _parse_json(f.read())
+    return [Pflanze.aus_json(eintrag, vokabular) for eintrag in eintraege]
+
+
+class Datenbank:
+    """Unveränderlicher Stand der Datenbank: Pflanzen, Suchindizes und Vokabular"""
+
+    __slots__ = ('pflanzen', 'index', 'namen', 'volltext', 'unscharf', 'bitsets',
+                 'kalender', 'vokabular', 'version')
+
+    def __init__(self, pflanzen, index, namen, volltext, unscharf, bitsets, kalender,
+                 vokabular, version):
+        object.__setattr__(self, 'pflanzen', tuple(pflanzen))
+        object.__setattr__(self, 'index', index)
+        object.__setattr__(self, 'namen', namen)
+        object.__setattr__(self, 'volltext', volltext)
+        object.__setattr__(self, 'unscharf', unscharf)
+        object.__setattr__(self, 'bitsets', bitsets)
+        object.__setattr__(self, 'kalender', kalender)
+        object.__setattr__(self, 'vokabular', vokabular)
+        object.__setattr__(self, 'version', version)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Datenbank ist schreibgeschützt")
+
+    def __reduce__(self):
+        return (Datenbank, (self.pflanzen, self.index, self.namen, self.volltext,
+                           self.unscharf, self.bitsets, self.kalender, self.vokabular, self.version))
+
+    def __len__(self):
+        return len(self.pflanzen)
+
+
+def baue_datenbank(inhalt):
+    """Baut Datensätze und Indizes aus dem Inhalt von heilkraeuter_db.json"""
+    vokabular = Vokabular()
+    pflanzen = tuple(Pflanze.aus_json(eintrag, vokabular) for eintrag in _parse_json(inhalt))
+    version = hashlib.sha256(inhalt).hexdigest()
+    kalender = Erntekalender(pflanzen)
+    return Datenbank(pflanzen, PflanzenIndex(pflanzen), NamensAufloeser(pflanzen),
+                     Volltextindex(pflanzen), TrigrammIndex(pflanzen),
+                     BitsetIndex(pflanzen, kalender.gesamt), kalender, vokabular, version)
+
+
+# Binärer Snapshot: Header (Magic, Format-Kennung, Hash der JSON-Quelle) + Pickle
+# Quelltext, der bestimmt, was im Snapshot steht (Datensätze, Indizes, Parser)
+SNAPSHOT_QUELLEN = (__file__, suche.__file__, erntekalender.__file__)
+
+
+def _format_kennung():
+    """Ändert sich mit der Snapshot-Version, dem Aufbau der Datensätze und
+    dem Quelltext der Index-Module
+
+    Geänderte Gewichte, Tokenizer oder Parse-Regeln machen einen alten
+    Snapshot damit ungültig, auch wenn das JSON gleich bleibt.
+    """
+    h = hashlib.sha256(repr((SNAPSHOT_VERSION, Pflanze.__slots__, Datenbank.__slots__)).encode('utf-8'))
+    for quelle in SNAPSHOT_QUELLEN:
+        with open(quelle, 'rb') as f:
+            h.update(f.read())
+    return h.digest()[:8]
+
+
+def schreibe_snapshot(db, pfad=SNAPSHOT_PFAD):
+    """Schreibt den Snapshot atomar (temporäre Datei + Umbenennen)"""
+    header = SNAPSHOT_MAGIC + _format_kennung() + bytes.fromhex(db.version)
+    tmp_pfad = f"{pfad}.tmp"
+    with open(tmp_pfad, 'wb') as f:
+        f.write(header)
+        pickle.dump(db, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_pfad, pfad)
+
+
+def lade_snapshot(version, pfad=SNAPSHOT_PFAD):
+    """Lädt den Snapshot, falls er zur JSON-Quelle mit diesem Hash passt, sonst None"""
+    try:
+        with open(pfad, 'rb') as f:
+            header = f.read(len(SNAPSHOT_MAGIC) + 8 + 32)
+            if header != SNAPSHOT_MAGIC + _format_kennung() + bytes.fromhex(version):
+                return None
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+
+def lade_datenbank(pfad=DB_PFAD, snapshot_pfad=SNAPSHOT_PFAD):
+    """Lädt den Snapshot, wenn er aktuell ist, sonst das JSON (und erneuert den Snapshot)"""
+    with open(pfad, 'rb') as f:
+        inhalt = f.read()
+    version = hashlib.sha256(inhalt).hexdigest()
+
+    db = lade_snapshot(version, snapshot_pfad)
+    if db is not None:
+        return db
+
+    db = baue_datenbank(inhalt)
+    try:
+        schreibe_snapshot(db, snapshot_pfad)
+    except OSError:
+        # Schreibgeschütztes Dateisystem: dann eben beim nächsten Start wieder aus dem JSON
+        pass
+    return db
+
+
+class DatenbankWatcher:
+    """Lädt die Datenbank neu, sobald heilkraeuter_db.json ersetzt wird
+
+    Geprüft wird zuerst die Signatur (mtime, Grösse, Inode), bei Änderungen
+    dann der Hash des Inhalts. Der neue Stand wird im Hintergrund gebaut und
+    danach in einem Schritt ausgetauscht; laufende Reruns arbeiten mit dem
+    Stand weiter, den sie zu Beginn über `aktuell` geholt haben.
+    """
+
+    def __init__(self, pfad=DB_PFAD, snapshot_pfad=SNAPSHOT_PFAD, intervall=5.0):
+        self.pfad = pfad
+        self.snapshot_pfad = snapshot_pfad
+        self.intervall = intervall
+        self._signatur = self._lies_signatur()
+        self._db = lade_datenbank(pfad, snapshot_pfad)
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def aktuell(self):
+        return self._db
+
+    def _lies_signatur(self):
+        try:
+            stat = os.stat(self.pfad)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def pruefe(self):
+        """Prüft einmal auf Änderungen; gibt True zurück, wenn neu geladen wurde"""
+        signatur = self._lies_signatur()
+        # Während `mv` kann die Datei kurz fehlen: alten Stand behalten
+        if signatur is None or signatur == self._signatur:
+            return False
+
+        # Signatur vorab merken: eine fehlerhafte Datei wird nur einmal gemeldet
+        self._signatur = signatur
+        with open(self.pfad, 'rb') as f:
+            inhalt = f.read()
+        if hashlib.sha256(inhalt).hexdigest() == self._db.version:
+            return False
+
+        neu = baue_datenbank(inhalt)
+        try:
+            schreibe_snapshot(neu, self.snapshot_pfad)
+        except OSError:
+            pass
+        self._db = neu
+        return True
+
+    def _laufe(self):
+        while not self._stop.wait(self.intervall):
+            try:
+                if self.pruefe():
+                    print(f"🔄 Datenbank neu geladen: {len(self._db)} Pflanzen ({self._db.version[:12]})")
+            except Exception as e:
+                # Halb geschriebene oder fehlerhafte Datei: alten Stand weiter ausliefern
+                print(f"⚠️ Neuladen der Datenbank fehlgeschlagen: {e}")
+
+    def starte(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._laufe, name="datenbank-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stoppe(self):
+        self._stop.set()
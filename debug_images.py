@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 """
 Debug Script: Prüft welche Pflanzen Bilder haben und welche nicht
+
+Liest das Bild-Manifest (static/bilder/manifest.json) statt jede mögliche
+Dateiendung einzeln auf der Platte zu suchen. Geänderte Originale werden
+dabei neu erfasst, das Manifest selbst bleibt unverändert.
 """
 
 import json
-import os
 from pathlib import Path
 
+import bilder
+
 # Lade Datenbank
 print("=" * 60)
 print("🔍 BILDER-DEBUG für Heilkräuter-Datenbank")
@@ -21,7 +26,7 @@ print(f"📊 Total: {len(pflanzen)} Pflanzen in der Datenbank")
 print()
 
 # Prüfe welche Bilder existieren
-images_folder = Path('images')
+images_folder = Path(bilder.BILDER_ORDNER)
 
 if not images_folder.exists():
     print("❌ FEHLER: Ordner 'images/' existiert nicht!")
@@ -34,74 +39,56 @@ if not images_folder.exists():
 print(f"✅ Ordner 'images/' gefunden")
 print()
 
-# Liste alle Dateien im images/ Ordner
-image_files = list(images_folder.glob('*'))
-print(f"📁 Dateien im images/ Ordner: {len(image_files)}")
+# Inventar aller Originale aus dem Manifest
+manifest = bilder.erfasse_originale(alt=bilder.lade_manifest())
+print(f"📁 Bilder im Manifest: {len(manifest)}")
 print()
 
-if image_files:
+if manifest:
     print("Gefundene Dateien:")
-    for f in sorted(image_files):
-        size_kb = f.stat().st_size / 1024
-        print(f"  - {f.name} ({size_kb:.1f} KB)")
+    for pfad, eintrag in manifest.items():
+        print(f"  - {Path(pfad).name} ({eintrag['breite']}×{eintrag['hoehe']}, {eintrag['bytes'] / 1024:.1f} KB)")
     print()
 
+# Dateiname ohne Endung -> Pfad, für Bilder mit anderer Extension
+nach_stamm = {Path(pfad).stem.lower(): pfad for pfad in manifest}
+
 # Prüfe jede Pflanze
 missing = []
 found = []
 wrong_path = []
 
-extensions = ['.webp', '.jpg', '.jpeg', '.png', '.WEBP', '.JPG', '.JPEG', '.PNG']
-
 for pflanze in pflanzen:
     name = pflanze['deutsch']
     bild_path = pflanze.get('bild', 'N/A')
-    
-    # Extrahiere Dateinamen aus bild_path
-    if bild_path != 'N/A' and bild_path.startswith('images/'):
-        # z.B. "images/kamille.png" -> "kamille.png"
-        bild_filename = Path(bild_path).name
-        
-        # Prüfe ob genau diese Datei existiert
-        actual_path = images_folder / bild_filename
-        
-        if actual_path.exists():
-            found.append({
-                'name': name,
-                'path': bild_path,
-                'actual': str(actual_path),
-                'size': actual_path.stat().st_size / 1024
-            })
-        else:
-            # Datei fehlt - prüfe ob mit anderer Extension existiert
-            base_without_ext = actual_path.stem
-            image_found = False
-            actual_file = None
-            
-            for ext in extensions:
-                test_path = images_folder / f"{base_without_ext}{ext}"
-                if test_path.exists():
-                    image_found = True
-                    actual_file = test_path
-                    break
-            
-            if image_found:
-                wrong_path.append({
-                    'name': name,
-                    'path_in_db': bild_path,
-                    'actual_file': str(actual_file),
-                    'suggestion': f"Ändere 'bild' zu: images/{actual_file.name}"
-                })
-            else:
-                missing.append({
-                    'name': name,
-                    'expected_path': bild_path,
-                    'expected_file': str(actual_path)
-                })
-    else:
+    eintrag = manifest.get(bild_path)
+
+    if eintrag:
+        found.append({
+            'name': name,
+            'path': bild_path,
+            'size': eintrag['bytes'] / 1024,
+            'dimensions': f"{eintrag['breite']}×{eintrag['hoehe']}",
+            'hash': eintrag['hash'][:12]
+        })
+        continue
+
+    # Datei fehlt - prüfe ob mit anderer Extension existiert
+    # z.B. "images/kamille.png" -> "kamille"
+    actual_file = nach_stamm.get(Path(bild_path).stem.lower())
+
+    if actual_file:
         wrong_path.append({
             'name': name,
-            'path': bild_path
+            'path_in_db': bild_path,
+            'actual_file': actual_file,
+            'suggestion': f"Ändere 'bild' zu: {actual_file}"
+        })
+    else:
+        missing.append({
+            'name': name,
+            'expected_path': bild_path,
+            'expected_file': str(images_folder / Path(bild_path).name)
         })
 
 # Ausgabe
@@ -123,8 +110,8 @@ if found:
     for item in found:
         print(f"✅ {item['name']}")
         print(f"   Pfad in DB: {item['path']}")
-        print(f"   Datei:      {item['actual']}")
-        print(f"   Größe:      {item['size']:.1f} KB")
+        print(f"   Größe:      {item['size']:.1f} KB ({item['dimensions']})")
+        print(f"   Hash:       {item['hash']}")
         print()
 
 if missing:
@@ -163,7 +150,7 @@ if missing:
         filename = Path(item['expected_file']).name
         print(f"  - {filename}")
     print()
-    
+
     print("  → Erstelle diese Bilder oder verwende Placeholder")
     print()
 
@@ -185,4 +172,4 @@ print()
 
 print("=" * 60)
 print("✅ Debug abgeschlossen!")
-print("=" * 60)
\ No newline at end of file
+print("=" * 60)
@@ -0,0 +1,171 @@
+"""
+Erntekalender: Erntemonate als 12-Bit-Masken
+
+`erntemonate` und der Freitext `bluete_erntezeit` werden beim Laden der
+Datenbank einmal geparst. Bit 0 steht für Januar, Bit 11 für Dezember.
+"""
+
+import re
+
+from suche import MONATE, falte
+
+ALLE_MONATE = (1 << 12) - 1
+
+_MONAT_BIT = {falte(m): 1 << i for i, m in enumerate(MONATE)}
+
+JAHRESZEITEN = {
+    'fruhling': 0b000000011100,
+    'fruhjahr': 0b000000011100,
+    'sommer': 0b000011100000,
+    'herbst': 0b011100000000,
+    'winter': 0b100000000011,
+}
+
+# Wortstamm (gefaltet) -> Pflanzenteil; erkennt auch Komposita wie "Sommertriebe"
+PFLANZENTEILE = (
+    ('blut', 'Blüten'),
+    ('blat', 'Blätter'),
+    ('trieb', 'Kraut'),
+    ('kraut', 'Kraut'),
+    ('samen', 'Samen'),
+    ('frucht', 'Früchte'),
+    ('beer', 'Früchte'),
+    ('nuss', 'Früchte'),
+    ('wurzel', 'Wurzeln'),
+)
+
+# Ohne Angabe eines Pflanzenteils
+ERNTE = 'Ernte'
+
+SYMBOLE = {
+    'Blüten': '🌸', 'Blätter': '🍃', 'Kraut': '🌿', 'Samen': '🌾',
+    'Früchte': '🍒', 'Wurzeln': '🥕', ERNTE: '●',
+}
+
+_ABSCHNITT = re.compile(r'\(([^)]*)\)|([^,()]+)')
+_WORT = re.compile(r'[a-z]+|-')
+
+
+def maske_aus_monaten(monate):
+    maske = 0
+    for monat in monate:
+        maske |= _MONAT_BIT.get(falte(monat), 0)
+    return maske
+
+
+def monate_aus_maske(maske):
+    return [m for i, m in enumerate(MONATE) if maske >> i & 1]
+
+
+def _bereich(von, bis):
+    """Monatsbereich als Maske, auch über den Jahreswechsel (z.B. November-Februar)"""
+    maske = 0
+    bit = von
+    while True:
+        maske |= bit
+        if bit == bis:
+            return maske
+        bit = bit << 1 if bit < 1 << 11 else 1
+
+
+def _teil(woerter):
+    for wort in woerter:
+        for stamm, teil in PFLANZENTEILE:
+            if stamm in wort:
+                return teil
+    return None
+
+
+def _monatsmaske(woerter):
+    """"marz bis mai", "oktober - november", "herbst" -> Maske"""
+    maske = 0
+    vorher = None
+    bereich_offen = False
+    for wort in woerter:
+        if wort in ('bis', '-'):
+            bereich_offen = vorher is not None
+            continue
+        bit = _MONAT_BIT.get(wort)
+        if bit is not None:
+            maske |= _bereich(vorher, bit) if bereich_offen else bit
+            vorher = bit
+        elif wort in JAHRESZEITEN:
+            maske |= JAHRESZEITEN[wort]
+            vorher = None
+        bereich_offen = False
+    return maske
+
+
+def parse_erntezeit(text):
+    """Zerlegt `bluete_erntezeit` in {Pflanzenteil: Maske}
+
+    "März bis Oktober (Blätter), Samen August-Oktober"
+        -> {'Blätter': März-Oktober, 'Samen': August-Oktober}
+    Eine Klammer nur mit Pflanzenteil benennt den Bereich davor.
+    """
+    eintraege = []  # [Teil oder None, Maske]
+    for klammer, text_teil in _ABSCHNITT.findall(text):
+        woerter = _WORT.findall(falte(klammer or text_teil))
+        teil = _teil(woerter)
+        maske = _monatsmaske(woerter)
+        if maske:
+            eintraege.append([teil, maske])
+        elif klammer and teil and eintraege and eintraege[-1][0] is None:
+            eintraege[-1][0] = teil
+
+    ergebnis = {}
+    for teil, maske in eintraege:
+        teil = teil or ERNTE
+        ergebnis[teil] = ergebnis.get(teil, 0) | maske
+    return ergebnis
+
+
+class Erntekalender:
+    """Erntemasken aller Pflanzen, je Pflanzenteil und gesamt"""
+
+    def __init__(self, pflanzen):
+        self.pflanzen = tuple(pflanzen)
+        teile = []
+        gesamt = []
+        for p in self.pflanzen:
+            pro_teil = parse_erntezeit(p.bluete_erntezeit)
+            geparst = 0
+            for teil_maske in pro_teil.values():
+                geparst |= teil_maske
+            # Monate aus `erntemonate`, die der Freitext keinem Teil zuordnet
+            rest = maske_aus_monaten(p.erntemonate) & ~geparst
+            if rest:
+                pro_teil[ERNTE] = pro_teil.get(ERNTE, 0) | rest
+            teile.append(tuple(pro_teil.items()))
+            gesamt.append(geparst | rest)
+        self.teile = tuple(teile)
+        self.gesamt = tuple(gesamt)
+        self.pro_monat = tuple(
+            tuple(p for p, maske in zip(self.pflanzen, self.gesamt) if maske >> i & 1)
+            for i in range(12)
+        )
+
+        # Vorberechnete Tabellenzeilen: Symbole der Pflanzenteile pro Monat
+        self.zeilen = tuple(
+            tuple(''.join(SYMBOLE[teil] for teil, maske in pro_teil if maske >> i & 1)
+                  for i in range(12))
+            for pro_teil in self.teile
+        )
+
+    def nach_monat(self, monat):
+        bit = _MONAT_BIT.get(falte(monat), 0)
+        return list(self.pro_monat[bit.bit_length() - 1]) if bit else []
+
+    def tabelle(self, monat=None):
+        """Spalten für st.dataframe: Pflanze plus je Monat die Symbole der Pflanzenteile"""
+        bit = _MONAT_BIT.get(falte(monat), 0) if monat else ALLE_MONATE
+        spalten = {'Pflanze': []}
+        for m in MONATE:
+            spalten[m[:3]] = []
+        for p, maske, zeile in zip(self.pflanzen, self.gesamt, self.zeilen):
+            if not maske & bit:
+                continue
+            spalten['Pflanze'].append(p.deutsch)
+            for m, zelle in zip(MONATE, zeile):
+                spalten[m[:3]].append(zelle)
+        return spalten
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Export: Rendert jede Pflanze als statische HTML-Seite für ein CDN
+
+Erzeugt pro Pflanze eine Seite mit der gleichen Karte wie die App
+(karten.py), dazu eine Übersicht (index.html) und suche.json für die
+Suche im Browser. Die Kartenbilder werden als Varianten mit Inhalts-Hash
+mitkopiert. Für Crawler und Erstbesucher braucht es damit weder Python
+noch eine Streamlit-Session.
+
+Verwendung:
+    python export_static.py [ZIELORDNER]    (Standard: export/)
+
+`PHYTOS_APP_URL` ist die Adresse der App, auf die die Seiten verlinken.
+"""
+
+import html
+import json
+import os
+import re
+import shutil
+import sys
+
+import bilder
+import datenbank
+import karten
+
+ZIEL_ORDNER = sys.argv[1] if len(sys.argv) > 1 else 'export'
+APP_URL = os.environ.get('PHYTOS_APP_URL', 'https://phytos.streamlit.app')
+BILDBREITE = 480
+
+SEITEN_CSS = """
+body {
+    font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
+    max-width: 1100px;
+    margin: 0 auto;
+    padding: 1rem 1.5rem 3rem 1.5rem;
+    line-height: 1.5;
+    color: #262730;
+}
+a { color: #2e7d32; }
+.main-header { font-size: 2.2rem; font-weight: bold; color: #2e7d32; text-decoration: none; }
+.subtitle { font-size: 1.1rem; color: #666; margin-bottom: 1.5rem; }
+.disclaimer {
+    background-color: #fff3cd;
+    border-left: 4px solid #ffc107;
+    padding: 15px;
+    margin: 30px 0;
+    border-radius: 4px;
+    color: #856404;
+}
+#suche { width: 100%; padding: 0.6rem; font-size: 1rem; margin-bottom: 1rem; }
+"""
+
+HINWEIS = (
+    '<div class="disclaimer"><strong>⚠️ Wichtiger medizinischer Hinweis:</strong><br>'
+    'Diese Datenbank dient ausschliesslich zu Informationszwecken. Die Informationen ersetzen keine '
+    'ärztliche Beratung, Diagnose oder Behandlung. Auch pflanzliche Mittel können Nebenwirkungen '
+    'haben und mit Medikamenten interagieren.</div>'
+)
+
+# Filtert die Zeilen der Übersicht anhand von suche.json
+SUCH_SKRIPT = """
+fetch('suche.json').then(function (antwort) { return antwort.json(); }).then(function (daten) {
+    var texte = {};
+    daten.pflanzen.forEach(function (p) {
+        texte[p.id] = [p.deutsch, p.lateinisch].concat(p.synonyme, p.symptome, p.wirkung).join(' ').toLowerCase();
+    });
+    document.getElementById('suche').addEventListener('input', function (e) {
+        var begriff = e.target.value.trim().toLowerCase();
+        document.querySelectorAll('[data-pflanze]').forEach(function (zeile) {
+            var text = texte[zeile.dataset.pflanze] || '';
+            zeile.hidden = begriff !== '' && text.indexOf(begriff) === -1;
+        });
+    });
+});
+"""
+
+
+def slug(name):
+    """Dateiname aus dem deutschen Namen: "Echte Kamille" -> "echte-kamille" """
+    name = name.lower()
+    for umlaut, ersatz in (('ä', 'ae'), ('ö', 'oe'), ('ü', 'ue'), ('ß', 'ss')):
+        name = name.replace(umlaut, ersatz)
+    return re.sub(r'[^a-z0-9]+', '-', name).strip('-')
+
+
+def json_im_skript(daten):
+    # "</" würde das Script-Tag vorzeitig schliessen
+    return json.dumps(daten, ensure_ascii=False).replace('</', '<\\/')
+
+
+def seite(titel, beschreibung, inhalt, kopf_zusatz='', start='index.html'):
+    return f"""<!DOCTYPE html>
+<html lang="de">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html.escape(titel)}</title>
+<meta name="description" content="{html.escape(beschreibung)}">
+<meta name="robots" content="index, follow">
+<meta property="og:title" content="{html.escape(titel)}">
+<meta property="og:description" content="{html.escape(beschreibung)}">
+<meta property="og:type" content="website">
+<style>{SEITEN_CSS}{karten.CSS}</style>
+{kopf_zusatz}
+</head>
+<body>
+<a href="{start}" class="main-header">🌿 Europäische Heilkräuter-Datenbank</a>
+<div class="subtitle">Wissenschaftlich belegte Heilpflanzen für die einfache Anwendung ·
+<a href="{html.escape(APP_URL)}">Zur App mit Suche und Pflanzenerkennung</a></div>
+{inhalt}
+{HINWEIS}
+</body>
+</html>
+"""
+
+
+def beschreibung(pflanze):
+    text = (f"{pflanze.deutsch} ({pflanze.lateinisch}): {', '.join(pflanze.wirkung)}. "
+            f"Anwendung bei {', '.join(pflanze.symptome)}.")
+    return text if len(text) <= 160 else text[:157].rsplit(' ', 1)[0] + '…'
+
+
+def pflanzenseite(pflanze, bild):
+    strukturiert = {
+        '@context': 'https://schema.org',
+        '@type': 'MedicalWebPage',
+        'name': f"{pflanze.deutsch} ({pflanze.lateinisch})",
+        'description': beschreibung(pflanze),
+        'inLanguage': 'de',
+        'specialty': 'Phytotherapy',
+        'about': {'@type': 'Thing', 'name': pflanze.lateinisch, 'alternateName': [pflanze.deutsch, *pflanze.synonyme]},
+    }
+    kopf = f'<script type="application/ld+json">{json_im_skript(strukturiert)}</script>'
+    inhalt = (karten.baue_karte(pflanze, karten.DETAILS, bild)
+              + '<p><a href="../index.html">← Alle Pflanzen</a></p>')
+    titel = f"{pflanze.deutsch} ({pflanze.lateinisch}) | Heilkräuter-Datenbank"
+    return seite(titel, beschreibung(pflanze), inhalt, kopf, start='../index.html')
+
+
+def uebersicht(pflanzen, seiten):
+    zeilen = ''.join(
+        f'<p data-pflanze="{p.id}"><a href="pflanzen/{seiten[p.id]}"><strong>🌿 {html.escape(p.deutsch)}</strong></a>'
+        f' · <em>{html.escape(p.lateinisch)}</em>'
+        f' <span style="opacity: 0.7;">— {html.escape(", ".join(p.symptome))}</span></p>'
+        for p in pflanzen
+    )
+    inhalt = (f'<h1>Alle Pflanzen</h1><p><em>Gesamte Datenbank: {len(pflanzen)} wissenschaftlich belegte Heilpflanzen</em></p>'
+              '<input id="suche" type="search" placeholder="Suche nach Name, Symptom oder Wirkung…">'
+              f'{zeilen}<script>{SUCH_SKRIPT}</script>')
+    return seite("Heilkräuter Schweiz | Wissenschaftlich belegte Phytotherapie | Heilpflanzen-Datenbank",
+                 f"Wissenschaftlich belegte Heilkräuter aus der Schweiz und Europa. {len(pflanzen)} Heilpflanzen "
+                 "mit Anwendung, Wirkung, Zubereitung und Sicherheitshinweisen.", inhalt)
+
+
+def schreibe(pfad, text):
+    with open(pfad, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+print("Lade Datenbank...")
+db = datenbank.lade_datenbank()
+pflanzen = list(db.pflanzen)
+print(f"📊 {len(pflanzen)} Pflanzen")
+
+print("Prüfe Bild-Varianten...")
+bilder.baue_varianten()
+katalog = bilder.BildKatalog()
+
+os.makedirs(os.path.join(ZIEL_ORDNER, 'pflanzen'), exist_ok=True)
+os.makedirs(os.path.join(ZIEL_ORDNER, 'bilder'), exist_ok=True)
+
+seiten = {}
+for pflanze in pflanzen:
+    name = slug(pflanze.deutsch) or str(pflanze.id)
+    if f"{name}.html" in seiten.values():
+        name = f"{name}-{pflanze.id}"
+    seiten[pflanze.id] = f"{name}.html"
+
+bild_bytes = 0
+ohne_bild = []
+for pflanze in pflanzen:
+    bild = None
+    variante = katalog.variante(pflanze.bild, BILDBREITE)
+    if variante:
+        # Dateiname enthält den Inhalts-Hash: unveränderlich, beliebig lange cachebar
+        ziel = os.path.join(ZIEL_ORDNER, 'bilder', os.path.basename(variante))
+        if not os.path.exists(ziel):
+            shutil.copyfile(variante, ziel)
+        bild_bytes += os.path.getsize(ziel)
+        bild = (katalog.url(pflanze.bild, BILDBREITE, basis='../bilder'),
+                *katalog.abmessungen(pflanze.bild, BILDBREITE))
+    else:
+        ohne_bild.append(pflanze.deutsch)
+    schreibe(os.path.join(ZIEL_ORDNER, 'pflanzen', seiten[pflanze.id]), pflanzenseite(pflanze, bild))
+
+schreibe(os.path.join(ZIEL_ORDNER, 'index.html'), uebersicht(pflanzen, seiten))
+
+suche = {
+    'version': db.version,
+    'pflanzen': [
+        {
+            'id': p.id,
+            'deutsch': p.deutsch,
+            'lateinisch': p.lateinisch,
+            'synonyme': list(p.synonyme),
+            'symptome': list(p.symptome),
+            'wirkung': list(p.wirkung),
+            'erntemonate': list(p.erntemonate),
+            'url': f"pflanzen/{seiten[p.id]}",
+        }
+        for p in pflanzen
+    ],
+}
+with open(os.path.join(ZIEL_ORDNER, 'suche.json'), 'w', encoding='utf-8') as f:
+    json.dump(suche, f, ensure_ascii=False, separators=(',', ':'))
+
+print()
+print(f"✅ Export geschrieben: {ZIEL_ORDNER}/")
+print(f"   Seiten:   {len(pflanzen)} + index.html")
+print(f"   Suche:    suche.json ({os.path.getsize(os.path.join(ZIEL_ORDNER, 'suche.json')) / 1024:.1f} KB)")
+print(f"   Bilder:   {bild_bytes / 1024 / 1024:.1f} MB")
+if ohne_bild:
+    print()
+    print(f"⚠️  {len(ohne_bild)} Pflanze(n) ohne Bild (siehe debug_images.py):")
+    for name in ohne_bild:
+        print(f"  - {name}")
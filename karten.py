@@ -0,0 +1,234 @@
+"""
+Pflanzenkarten als fertige HTML-Fragmente
+
+Jede Karte wird einmal pro Pflanze, Detailstufe und Datenbank-Version zu
+einem einzigen HTML-String gebaut und im `KartenCache` abgelegt. Die App
+gibt sie mit einem einzigen `st.markdown` aus statt mit einem Dutzend
+Einzelaufrufen. Alle Texte aus der Datenbank werden escaped.
+
+Das Modul kennt Streamlit nicht, damit auch ein statischer Export die
+gleichen Karten verwenden kann.
+"""
+
+import html
+import re
+import threading
+from collections import OrderedDict
+
+# Detailstufen
+KURZ = 'kurz'
+DETAILS = 'details'
+UEBERSICHT = 'uebersicht'
+
+# Wird in den globalen <style>-Block der App eingefügt
+CSS = """
+.pflanzen-karte {
+    display: flex;
+    flex-wrap: wrap;
+    gap: 1.5rem;
+    border-top: 1px solid rgba(128, 128, 128, 0.3);
+    padding: 1.25rem 0 0.5rem 0;
+    margin-top: 1rem;
+}
+.pflanzen-karte .karte-bild {
+    flex: 1 1 200px;
+    min-width: 0;
+    margin: 0;
+}
+.pflanzen-karte .karte-bild img {
+    width: 100%;
+    height: auto;
+    border-radius: 4px;
+}
+.pflanzen-karte .karte-bild figcaption {
+    text-align: center;
+    font-size: 0.85rem;
+    opacity: 0.7;
+}
+.pflanzen-karte .karte-text {
+    flex: 2 1 320px;
+    min-width: 0;
+}
+.pflanzen-karte .karte-titel {
+    font-size: 1.5rem;
+    font-weight: 600;
+}
+.pflanzen-karte .karte-latein {
+    font-style: italic;
+    margin-bottom: 0.75rem;
+}
+.pflanzen-karte .karte-abschnitt {
+    border-top: 1px solid rgba(128, 128, 128, 0.2);
+    margin-top: 0.75rem;
+    padding-top: 0.75rem;
+}
+.pflanzen-karte .karte-spalten {
+    display: flex;
+    flex-wrap: wrap;
+    gap: 0 1.5rem;
+}
+.pflanzen-karte .karte-spalten > div {
+    flex: 1 1 260px;
+}
+.pflanzen-karte p {
+    margin: 0 0 0.4rem 0;
+}
+.pflanzen-zeile {
+    border-bottom: 1px solid rgba(128, 128, 128, 0.2);
+}
+.pflanzen-zeile summary {
+    cursor: pointer;
+    padding: 0.5rem 0;
+}
+.pflanzen-zeile .zeile-info {
+    opacity: 0.7;
+    font-size: 0.9rem;
+}
+.pflanzen-zeile .pflanzen-karte {
+    border-top: none;
+    margin-top: 0;
+    padding-top: 0.25rem;
+}
+"""
+
+
+def _text(wert):
+    """Escaped und auf eine Zeile gebracht
+
+    Leerzeilen würden den HTML-Block in st.markdown beenden.
+    """
+    return html.escape(re.sub(r'\s+', ' ', str(wert)).strip())
+
+
+def _liste(werte):
+    return _text(', '.join(werte))
+
+
+def _zeile(titel, wert):
+    return f'<p><strong>{titel}:</strong> {wert}</p>'
+
+
+def _bild(pflanze, bild):
+    url, breite, hoehe = bild
+    name = _text(pflanze.deutsch)
+    # Abmessungen aus dem Manifest reservieren den Platz vor dem Laden
+    return (f'<figure class="karte-bild">'
+            f'<img src="{html.escape(url)}" alt="{name}" width="{breite}" height="{hoehe}" loading="lazy">'
+            f'<figcaption>{name}</figcaption></figure>')
+
+
+def _details(pflanze):
+    teile = [
+        '<div class="karte-abschnitt">',
+        '<p><strong>📋 Anwendung &amp; Zubereitung:</strong></p>',
+        f'<p>{_text(pflanze.zubereitung)}</p>',
+        '</div><div class="karte-abschnitt">',
+        '<p><strong>🌸 Erntezeit &amp; Vorkommen:</strong></p>',
+        _zeile('Blüte/Erntezeit', _text(pflanze.bluete_erntezeit)),
+    ]
+    if pflanze.erntemonate:
+        teile.append(_zeile('Erntemonate', _liste(pflanze.erntemonate)))
+    teile += [
+        _zeile('Vorkommen', _text(pflanze.vorkommen)),
+        _zeile('Als Nahrungsmittel', _text(pflanze.nahrungsmittel)),
+        '</div><div class="karte-abschnitt">',
+        '<p><strong>⚠️ Sicherheitshinweise:</strong></p>',
+        _zeile('Nebenwirkungen', _text(pflanze.nebenwirkungen)),
+        _zeile('Kontraindikationen', _text(pflanze.kontraindikationen)),
+        '</div>',
+    ]
+    return teile
+
+
+def _uebersicht(pflanze):
+    teile = [
+        '<div class="karte-spalten"><div>',
+        _zeile('🩺 Symptome', _liste(pflanze.symptome)),
+        _zeile('💊 Wirkungen', _liste(pflanze.wirkung)),
+        _zeile('📋 Zubereitung', _text(pflanze.zubereitung)),
+        '</div><div>',
+        _zeile('🌸 Blüte/Erntezeit', _text(pflanze.bluete_erntezeit)),
+    ]
+    if pflanze.erntemonate:
+        teile.append(_zeile('📅 Erntemonate', _liste(pflanze.erntemonate)))
+    teile += [
+        _zeile('📍 Vorkommen', _text(pflanze.vorkommen)),
+        _zeile('🍴 Als Nahrungsmittel', _text(pflanze.nahrungsmittel)),
+        '</div></div>',
+        _zeile('⚠️ Nebenwirkungen', _text(pflanze.nebenwirkungen)),
+        _zeile('🚫 Kontraindikationen', _text(pflanze.kontraindikationen)),
+    ]
+    return teile
+
+
+def baue_karte(pflanze, stufe=KURZ, bild=None):
+    """HTML einer Pflanzenkarte
+
+    `bild` ist (URL, Breite, Höhe) oder None für eine Karte ohne Foto.
+    """
+    teile = [f'<div class="pflanzen-karte" id="pflanze-{pflanze.id}">']
+    if bild:
+        teile.append(_bild(pflanze, bild))
+    teile += [
+        '<div class="karte-text">',
+        f'<div class="karte-titel">🌿 {_text(pflanze.deutsch)}</div>',
+        f'<div class="karte-latein">{_text(pflanze.lateinisch)}</div>',
+    ]
+    if stufe == UEBERSICHT:
+        teile += _uebersicht(pflanze)
+    else:
+        teile += [
+            _zeile('🩺 Symptome', _liste(pflanze.symptome)),
+            _zeile('💊 Wirkungen', _liste(pflanze.wirkung)),
+        ]
+        if stufe == DETAILS:
+            teile += _details(pflanze)
+    teile.append('</div></div>')
+    return ''.join(teile)
+
+
+def baue_zeile(pflanze, stufe=DETAILS, bild=None):
+    """Kompakte Ergebniszeile, die beim Aufklappen die Karte zeigt
+
+    Ein <details>-Element klappt im Browser auf, ohne Rerun. Fotos darin
+    sind lazy und werden erst beim Aufklappen geladen.
+    """
+    return (f'<details class="pflanzen-zeile"><summary>'
+            f'<strong>🌿 {_text(pflanze.deutsch)}</strong> · <em>{_text(pflanze.lateinisch)}</em> '
+            f'<span class="zeile-info">— {_liste(pflanze.symptome)}</span></summary>'
+            f'{baue_karte(pflanze, stufe, bild)}</details>')
+
+
+class KartenCache:
+    """LRU-Cache fertiger Karten, geteilt von allen Sessions
+
+    Schlüssel ist (Pflanzen-ID, Detailstufe, Datenbank-Version, Bild, Zeile).
+    Die Bild-URL enthält den Inhalts-Hash, ein neues Foto ergibt also eine
+    neue Karte; eine neue Datenbank-Version ebenso.
+    """
+
+    def __init__(self, max_eintraege=2048):
+        self.max_eintraege = max_eintraege
+        self._eintraege = OrderedDict()
+        self._lock = threading.Lock()
+
+    def karte(self, pflanze, stufe, version, bild=None, zeile=False):
+        """Fertige Karte, mit `zeile` als aufklappbare Ergebniszeile"""
+        schluessel = (pflanze.id, stufe, version, bild, zeile)
+        with self._lock:
+            fragment = self._eintraege.get(schluessel)
+            if fragment is not None:
+                self._eintraege.move_to_end(schluessel)
+                return fragment
+
+        if zeile:
+            fragment = baue_zeile(pflanze, stufe, bild)
+        else:
+            fragment = baue_karte(pflanze, stufe, bild)
+
+        with self._lock:
+            self._eintraege[schluessel] = fragment
+            self._eintraege.move_to_end(schluessel)
+            while len(self._eintraege) > self.max_eintraege:
+                self._eintraege.popitem(last=False)
+        return fragment
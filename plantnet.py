@@ -0,0 +1,703 @@
+"""
+Anbindung an die Pl@ntNet-API für die Pflanzenerkennung
+
+`PlantNetClient` hält eine Session mit Verbindungspool, begrenzt jede
+Anfrage mit Timeouts, wiederholt bei 429/5xx mit zufällig gestreutem Backoff
+und setzt nach wiederholten Fehlern für eine Weile aus (Circuit Breaker),
+statt Script-Threads an einen hängenden Dienst zu binden.
+
+`Erkennungsdienst` führt Identifikationen auf einem begrenzten Thread-Pool
+aus. Die App startet einen Auftrag, fragt ihn per Fragment ab und kann ihn
+abbrechen, ohne dass ein Script-Thread auf die Antwort wartet. Stapel mit
+vielen Fotos werden parallel vorverarbeitet und mit begrenzter
+Parallelität gesendet, oder als Organe einer Pflanze in einer Anfrage.
+
+Identifikationen werden pro Bild-Hash zwischengespeichert: im Speicher als
+LRU mit Ablaufzeit und zusätzlich in einer SQLite-Datei, damit Ergebnisse
+einen Neustart überstehen. Jede Wiederholung spart Zeit und Tageskontingent.
+Gleichzeitige Anfragen zum selben Bild teilen sich einen Aufruf.
+
+`Kontingent` zählt die Aufrufe pro Tag und API-Key (ebenfalls in SQLite)
+und verteilt sie per Token Bucket über den Tag, damit das Kontingent nicht
+schon mittags aufgebraucht ist.
+"""
+
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import date
+from functools import partial
+from io import BytesIO
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import bilder
+
+# Für Tests oder einen Proxy überschreibbar
+BASIS_URL = os.environ.get('PLANTNET_URL', 'https://my-api.plantnet.org')
+PROJEKT = 'all'
+
+# (Verbindungsaufbau, Antwort) in Sekunden
+TIMEOUT = (3.05, 20)
+
+# Pl@ntNet nimmt höchstens 5 Bilder (Organe) derselben Pflanze pro Anfrage
+MAX_ORGANE = 5
+STAPEL_MAX_FOTOS = 30
+STAPEL_PARALLEL = 3
+
+CACHE_PFAD = 'plantnet_cache.sqlite'
+CACHE_TTL = 7 * 24 * 3600
+
+# Kostenloser Pl@ntNet-Zugang: 500 Identifikationen pro Tag und API-Key
+TAGESKONTINGENT = 500
+# Darunter pausiert der Stapel-Modus, Einzelfotos gehen weiter
+KONTINGENT_RESERVE = 100
+
+
+def bild_schluessel(jpegs, organe=('auto',), projekt=PROJEKT):
+    """Cache-Schlüssel: Hash der normalisierten JPEGs plus Anfrageparameter"""
+    h = hashlib.sha256()
+    for jpeg in jpegs:
+        h.update(jpeg)
+    h.update(f"|{projekt}|{','.join(organe)}".encode('utf-8'))
+    return h.hexdigest()
+
+
+class PlantNetFehler(Exception):
+    """Identifikation fehlgeschlagen; `status` ist der HTTP-Status, falls es einen gab
+
+    `gesendet` ist False, wenn die Anfrage Pl@ntNet gar nicht erreicht hat.
+    """
+
+    def __init__(self, meldung, status=None, gesendet=True):
+        super().__init__(meldung)
+        self.status = status
+        self.gesendet = gesendet
+
+
+class Schutzschalter:
+    """Circuit Breaker: nach `schwelle` Fehlschlägen in Folge `pause` Sekunden Ruhe
+
+    Danach darf genau eine Probe-Anfrage durch; gelingt sie, ist der
+    Schalter wieder geschlossen, sonst beginnt die Pause von vorn.
+    """
+
+    def __init__(self, schwelle=5, pause=60.0):
+        self.schwelle = schwelle
+        self.pause = pause
+        self.fehler_in_folge = 0
+        self.offen_bis = 0.0
+        self._probe = False
+        self._lock = threading.Lock()
+
+    def erlaubt(self):
+        with self._lock:
+            if self.fehler_in_folge < self.schwelle:
+                return True
+            if time.monotonic() < self.offen_bis or self._probe:
+                return False
+            self._probe = True
+            return True
+
+    def erfolg(self):
+        with self._lock:
+            self.fehler_in_folge = 0
+            self._probe = False
+
+    def fehler(self):
+        with self._lock:
+            self.fehler_in_folge += 1
+            self._probe = False
+            if self.fehler_in_folge >= self.schwelle:
+                self.offen_bis = time.monotonic() + self.pause
+
+    def abgebrochen(self):
+        """Anfrage ohne Ergebnis beendet: zählt nicht, gibt aber die Probe frei"""
+        with self._lock:
+            self._probe = False
+
+    def restzeit(self):
+        """Sekunden bis zur nächsten Probe-Anfrage (0 = geschlossen)"""
+        if self.fehler_in_folge < self.schwelle:
+            return 0.0
+        return max(0.0, self.offen_bis - time.monotonic())
+
+
+class PlantNetClient:
+    """Pl@ntNet-Identifikation über eine gemeinsame Session mit Verbindungspool
+
+    Ein Client pro Prozess genügt: Session und Schutzschalter sind für
+    gleichzeitige Aufrufe aus mehreren Threads ausgelegt.
+    """
+
+    def __init__(self, basis_url=BASIS_URL, projekt=PROJEKT, timeout=TIMEOUT,
+                 versuche=3, backoff=0.5, max_backoff=8.0, pool=10, schalter=None):
+        self.url = f"{basis_url.rstrip('/')}/v2/identify/{projekt}"
+        self.timeout = timeout
+        self.versuche = versuche
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.schalter = schalter or Schutzschalter()
+
+        self.session = requests.Session()
+        # Wiederholungen übernimmt identifiziere(), der Adapter nur das Pooling (Keep-Alive)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _wartezeit(self, versuch, response=None):
+        """Full Jitter: zufällig zwischen 0 und exponentiell wachsender Obergrenze"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** versuch))
+
+    def nicht_erreichbar(self):
+        """Fehler für einen offenen Schutzschalter"""
+        return PlantNetFehler(
+            f"Pl@ntNet ist vorübergehend nicht erreichbar, "
+            f"neuer Versuch in {self.schalter.restzeit():.0f} s",
+            gesendet=False,
+        )
+
+    def identifiziere(self, jpegs, api_key, organe=None, abbruch=None):
+        """Schickt JPEGs einer Pflanze an Pl@ntNet und gibt die JSON-Antwort zurück
+
+        `organe` nennt pro Bild das Organ ('leaf', 'flower', ...), ohne
+        Angabe gilt 'auto'.
+
+        Wirft PlantNetFehler bei Client-Fehlern (4xx ausser 429) sofort, bei
+        429/5xx und Verbindungsproblemen nach `versuche` Anläufen. Ein
+        gesetztes `abbruch`-Event beendet die Wiederholungen vorzeitig; das
+        zählt nicht als Fehler für den Schutzschalter.
+        """
+        if abbruch is not None and abbruch.is_set():
+            raise PlantNetFehler("Identifikation abgebrochen", gesendet=False)
+        if not self.schalter.erlaubt():
+            raise self.nicht_erreichbar()
+
+        params = {'api-key': api_key}
+        files = [('images', (f'plant{i}.jpg', jpeg, 'image/jpeg')) for i, jpeg in enumerate(jpegs)]
+        data = {'organs': list(organe or ['auto'] * len(jpegs))}
+
+        fehler = None
+        for versuch in range(self.versuche):
+            response = None
+            try:
+                response = self.session.post(self.url, params=params, files=files, data=data, timeout=self.timeout)
+            except requests.Timeout:
+                fehler = PlantNetFehler("Zeitüberschreitung bei Pl@ntNet")
+            except requests.RequestException as e:
+                fehler = PlantNetFehler(f"Keine Verbindung zu Pl@ntNet: {e}")
+            else:
+                if response.status_code == 200:
+                    try:
+                        ergebnis = response.json()
+                    except ValueError:
+                        fehler = PlantNetFehler("Ungültige Antwort von Pl@ntNet")
+                    else:
+                        self.schalter.erfolg()
+                        return ergebnis
+                elif response.status_code != 429 and response.status_code < 500:
+                    # Der Dienst antwortet, die Anfrage ist das Problem: nicht wiederholen
+                    self.schalter.erfolg()
+                    raise PlantNetFehler(f"API Fehler: {response.status_code} - {response.text}", response.status_code)
+                else:
+                    fehler = PlantNetFehler(f"API Fehler: {response.status_code} - {response.text}", response.status_code)
+
+            if versuch + 1 < self.versuche:
+                wartezeit = self._wartezeit(versuch, response)
+                if abbruch is None:
+                    time.sleep(wartezeit)
+                elif abbruch.wait(wartezeit):
+                    # Abbruch durch den Nutzer sagt nichts über Pl@ntNet aus
+                    self.schalter.abgebrochen()
+                    raise PlantNetFehler("Identifikation abgebrochen")
+
+        self.schalter.fehler()
+        raise fehler
+
+
+class ErgebnisCache:
+    """Identifikationsergebnisse pro Bild-Schlüssel, LRU im Speicher plus SQLite
+
+    Mit `pfad=None` oder nicht beschreibbarer Datei bleibt nur der Speicher.
+    Abgelaufene Einträge (älter als `ttl` Sekunden) gelten als nicht vorhanden.
+    """
+
+    def __init__(self, pfad=CACHE_PFAD, ttl=CACHE_TTL, max_eintraege=256):
+        self.ttl = ttl
+        self.max_eintraege = max_eintraege
+        self._eintraege = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if pfad:
+            try:
+                self._db = sqlite3.connect(pfad, timeout=5, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS ergebnisse "
+                    "(schluessel TEXT PRIMARY KEY, zeit REAL NOT NULL, ergebnis TEXT NOT NULL)"
+                )
+                self._db.execute("DELETE FROM ergebnisse WHERE zeit < ?", (time.time() - ttl,))
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Pl@ntNet-Cache nur im Speicher ({pfad}: {e})")
+                self._db = None
+
+    def _merke(self, schluessel, zeit, ergebnis):
+        self._eintraege[schluessel] = (zeit, ergebnis)
+        self._eintraege.move_to_end(schluessel)
+        while len(self._eintraege) > self.max_eintraege:
+            self._eintraege.popitem(last=False)
+
+    def hole(self, schluessel):
+        """Gespeichertes Ergebnis oder None"""
+        grenze = time.time() - self.ttl
+        with self._lock:
+            treffer = self._eintraege.get(schluessel)
+            if treffer is not None:
+                if treffer[0] >= grenze:
+                    self._eintraege.move_to_end(schluessel)
+                    return treffer[1]
+                del self._eintraege[schluessel]
+
+            if self._db is None:
+                return None
+            try:
+                zeile = self._db.execute(
+                    "SELECT zeit, ergebnis FROM ergebnisse WHERE schluessel = ? AND zeit >= ?",
+                    (schluessel, grenze),
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+            if zeile is None:
+                return None
+            ergebnis = json.loads(zeile[1])
+            self._merke(schluessel, zeile[0], ergebnis)
+            return ergebnis
+
+    def speichere(self, schluessel, ergebnis):
+        zeit = time.time()
+        with self._lock:
+            self._merke(schluessel, zeit, ergebnis)
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO ergebnisse VALUES (?, ?, ?)",
+                    (schluessel, zeit, json.dumps(ergebnis, ensure_ascii=False)),
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Pl@ntNet-Ergebnis nicht gespeichert: {e}")
+
+    def __len__(self):
+        return len(self._eintraege)
+
+
+class Kontingent:
+    """Tageskontingent und Rate-Limit für Pl@ntNet-Aufrufe, prozessweit
+
+    Der Tageszähler pro API-Key liegt in SQLite und gilt damit auch über
+    Neustarts und mehrere Prozesse hinweg. Meldet Pl@ntNet selbst den
+    Reststand (`remainingIdentificationRequests`), wird der Zähler daran
+    angeglichen. Der Token Bucket (ebenfalls einer pro API-Key) erlaubt
+    Spitzen bis `kapazitaet` Aufrufe und füllt sich so, dass das Kontingent
+    für `stunden` Stunden reicht. Aufrufe ohne Identifikation (nicht
+    gesendet, abgebrochen, 429/5xx, Timeout) werden mit `erstatte` zurückgegeben.
+    """
+
+    def __init__(self, pfad=CACHE_PFAD, pro_tag=TAGESKONTINGENT, reserve=KONTINGENT_RESERVE,
+                 kapazitaet=40, stunden=16, max_warten=10.0):
+        self.pro_tag = pro_tag
+        self.reserve = reserve
+        self.kapazitaet = kapazitaet
+        self.rate = pro_tag / (stunden * 3600)
+        self.max_warten = max_warten
+        self._eimer = {}  # Konto -> (Tokens, Zeitpunkt der letzten Auffüllung)
+        self._zaehler = {}  # (Tag, Konto) -> Anzahl, falls ohne SQLite
+        self._lock = threading.Lock()
+        self._db = None
+        if pfad:
+            try:
+                self._db = sqlite3.connect(pfad, timeout=5, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS kontingent "
+                    "(tag TEXT, konto TEXT, anzahl INTEGER NOT NULL, PRIMARY KEY (tag, konto))"
+                )
+                self._db.execute("DELETE FROM kontingent WHERE tag < ?", (date.today().isoformat(),))
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Pl@ntNet-Kontingent nur im Speicher ({pfad}: {e})")
+                self._db = None
+
+    @staticmethod
+    def _konto(api_key):
+        # Nur ein Hash des Keys landet auf der Platte
+        return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+    def verbraucht(self, api_key):
+        schluessel = (date.today().isoformat(), self._konto(api_key))
+        with self._lock:
+            if self._db is None:
+                return self._zaehler.get(schluessel, 0)
+            try:
+                zeile = self._db.execute(
+                    "SELECT anzahl FROM kontingent WHERE tag = ? AND konto = ?", schluessel
+                ).fetchone()
+            except sqlite3.Error:
+                return self._zaehler.get(schluessel, 0)
+            return zeile[0] if zeile else 0
+
+    def rest(self, api_key):
+        return max(0, self.pro_tag - self.verbraucht(api_key))
+
+    def knapp(self, api_key):
+        """True, wenn nur noch die Reserve für Einzelfotos übrig ist"""
+        return self.rest(api_key) <= self.reserve
+
+    def _zaehle(self, api_key, anzahl=None, schritt=1):
+        """Ändert den Tageszähler um `schritt` oder setzt ihn auf `anzahl`"""
+        schluessel = (date.today().isoformat(), self._konto(api_key))
+        with self._lock:
+            if anzahl is None:
+                self._zaehler[schluessel] = max(0, self._zaehler.get(schluessel, 0) + schritt)
+            else:
+                self._zaehler[schluessel] = anzahl
+            if self._db is None:
+                return
+            try:
+                if anzahl is None:
+                    self._db.execute(
+                        "INSERT INTO kontingent VALUES (?, ?, MAX(0, ?)) "
+                        "ON CONFLICT (tag, konto) DO UPDATE SET anzahl = MAX(0, anzahl + ?)",
+                        (*schluessel, schritt, schritt),
+                    )
+                else:
+                    self._db.execute("INSERT OR REPLACE INTO kontingent VALUES (?, ?, ?)", (*schluessel, anzahl))
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Pl@ntNet-Kontingent nicht gespeichert: {e}")
+
+    def nimm(self, api_key, abbruch=None):
+        """Reserviert einen Aufruf; wirft PlantNetFehler, wenn das nicht geht
+
+        Fehlt nur ein Token, wird bis `max_warten` Sekunden gewartet; länger
+        hält kein Worker-Thread still.
+        """
+        if self.rest(api_key) <= 0:
+            raise PlantNetFehler("Das Tageskontingent für Pl@ntNet ist aufgebraucht, ab morgen geht es wieder")
+
+        konto = self._konto(api_key)
+        while True:
+            with self._lock:
+                jetzt = time.monotonic()
+                tokens, zuletzt = self._eimer.get(konto, (float(self.kapazitaet), jetzt))
+                tokens = min(self.kapazitaet, tokens + (jetzt - zuletzt) * self.rate)
+                if tokens >= 1:
+                    self._eimer[konto] = (tokens - 1, jetzt)
+                    break
+                self._eimer[konto] = (tokens, jetzt)
+                warten = (1 - tokens) / self.rate
+            if warten > self.max_warten:
+                raise PlantNetFehler(f"Gerade sehr viele Erkennungen, nächste in ca. {warten / 60:.0f} min möglich")
+            if abbruch is None:
+                time.sleep(warten)
+            elif abbruch.wait(warten):
+                raise PlantNetFehler("Identifikation abgebrochen")
+
+        self._zaehle(api_key)
+
+    def erstatte(self, api_key):
+        """Gibt einen mit `nimm` reservierten Aufruf zurück, der nicht gezählt hat"""
+        konto = self._konto(api_key)
+        with self._lock:
+            tokens, zuletzt = self._eimer.get(konto, (float(self.kapazitaet), time.monotonic()))
+            self._eimer[konto] = (min(self.kapazitaet, tokens + 1), zuletzt)
+        self._zaehle(api_key, schritt=-1)
+
+    def abgleichen(self, api_key, ergebnis):
+        """Übernimmt den von Pl@ntNet gemeldeten Reststand, falls vorhanden"""
+        rest = ergebnis.get('remainingIdentificationRequests')
+        if isinstance(rest, int):
+            self._zaehle(api_key, max(0, self.pro_tag - rest))
+
+
+class Auftrag:
+    """Eine Identifikation im Hintergrund
+
+    `fertig` wird True, sobald ein Ergebnis oder Fehler vorliegt; `abbrechen`
+    entfernt wartende Aufträge aus der Warteschlange und beendet bei
+    laufenden das Warten. Der Pl@ntNet-Aufruf selbst endet nach dem
+    aktuellen HTTP-Versuch, sofern niemand sonst auf ihn wartet.
+    """
+
+    def __init__(self):
+        self.abbruch = threading.Event()
+        self.future = None
+        self.gestartet = time.monotonic()
+
+    @property
+    def dauer(self):
+        return time.monotonic() - self.gestartet
+
+    @property
+    def fertig(self):
+        return self.future.done()
+
+    @property
+    def abgebrochen(self):
+        return self.abbruch.is_set()
+
+    def abbrechen(self):
+        self.abbruch.set()
+        self.future.cancel()
+
+    def ergebnis(self):
+        """JSON-Antwort; wirft PlantNetFehler bzw. ValueError (ungeeignetes Bild)"""
+        if self.future.cancelled():
+            raise PlantNetFehler("Identifikation abgebrochen")
+        return self.future.result()
+
+
+class Stapelauftrag:
+    """Mehrere Fotos im Hintergrund, einzeln oder gruppiert als eine Pflanze
+
+    `ergebnisse` und `fehler` haben einen Platz pro Anfrage (gruppiert: einen).
+    Plätze, die nach einem Abbruch nie gesendet wurden, bleiben beide None.
+    """
+
+    def __init__(self, anzahl):
+        self.abbruch = threading.Event()
+        self.ergebnisse = [None] * anzahl
+        self.fehler = [None] * anzahl
+        self.erledigt = 0
+        self.gestartet = time.monotonic()
+        self._fertig = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def anzahl(self):
+        return len(self.ergebnisse)
+
+    @property
+    def dauer(self):
+        return time.monotonic() - self.gestartet
+
+    @property
+    def fertig(self):
+        return self._fertig.is_set()
+
+    @property
+    def abgebrochen(self):
+        return self.abbruch.is_set()
+
+    def abbrechen(self):
+        self.abbruch.set()
+
+    def _melde(self, i, ergebnis=None, fehler=None):
+        with self._lock:
+            self.ergebnisse[i] = ergebnis
+            self.fehler[i] = fehler
+            self.erledigt += 1
+
+
+def _vorbereiten(daten):
+    try:
+        return bilder.bereite_upload_vor(BytesIO(daten))
+    except ValueError as e:
+        return e
+
+
+def _stapel_ergebnis(stapel, i, frei, future):
+    frei.release()
+    if future.cancelled():
+        stapel._melde(i, fehler="Identifikation abgebrochen")
+        return
+    try:
+        stapel._melde(i, ergebnis=future.result())
+    except Exception as e:
+        stapel._melde(i, fehler=str(e))
+
+
+class _Flug:
+    """Ein laufender Pl@ntNet-Aufruf, auf den eine oder mehrere Anfragen warten
+
+    `abbruch` wird erst gesetzt, wenn alle `wartende` abgebrochen haben.
+    """
+
+    def __init__(self):
+        self.future = Future()
+        self.abbruch = threading.Event()
+        self.wartende = 0
+
+
+class Erkennungsdienst:
+    """Identifikationen auf einem Thread-Pool mit begrenzter Zahl offener Aufträge
+
+    Höchstens `max_parallel` Anfragen laufen gleichzeitig, weitere
+    `max_wartend` warten. Darüber lehnt `starte` neue Aufträge ab, statt
+    die Warteschlange unbegrenzt wachsen zu lassen. Stapel reichen ihre
+    Fotos nach und nach in denselben Pool ein; höchstens `max_stapel`
+    laufen gleichzeitig.
+
+    Anfragen zum selben Cache-Schlüssel, die sich zeitlich überschneiden,
+    warten auf den ersten Aufruf, statt selbst einen zu starten. Der Aufruf
+    läuft auf einem eigenen Pool: bricht eine Anfrage ab, wartet nur sie
+    nicht mehr; abgebrochen wird der Aufruf erst, wenn niemand mehr wartet.
+    """
+
+    def __init__(self, client=None, cache=None, kontingent=None, max_parallel=4, max_wartend=8, max_stapel=2):
+        self.client = client or PlantNetClient()
+        self.cache = cache if cache is not None else ErgebnisCache()
+        self.kontingent = kontingent or Kontingent()
+        self._laufend = {}  # Cache-Schlüssel -> _Flug des laufenden Aufrufs
+        self._laufend_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="plantnet")
+        self._fluege = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="plantnet-aufruf")
+        self._plaetze = threading.BoundedSemaphore(max_parallel + max_wartend)
+        # Pillow gibt beim Dekodieren und Skalieren den GIL frei: echte Parallelität
+        self._vorbereitung = ThreadPoolExecutor(max_workers=os.cpu_count() or 2, thread_name_prefix="vorbereitung")
+        self._stapel_plaetze = threading.BoundedSemaphore(max_stapel)
+
+    def _identifiziere(self, jpegs, api_key, organe=None, abbruch=None):
+        organe = list(organe or ['auto'] * len(jpegs))
+        schluessel = bild_schluessel(jpegs, organe)
+        ergebnis = self.cache.hole(schluessel)
+        if ergebnis is not None:
+            return ergebnis
+
+        with self._laufend_lock:
+            flug = self._laufend.get(schluessel)
+            if flug is None:
+                flug = self._laufend[schluessel] = _Flug()
+                self._fluege.submit(self._fliege, flug, schluessel, jpegs, api_key, organe)
+            flug.wartende += 1
+        try:
+            # Single-Flight: jede Anfrage wartet (abbrechbar) nur für sich
+            while not flug.future.done():
+                if abbruch is not None and abbruch.is_set():
+                    raise PlantNetFehler("Identifikation abgebrochen")
+                wait([flug.future], timeout=0.25)
+            return flug.future.result()
+        finally:
+            with self._laufend_lock:
+                flug.wartende -= 1
+                if flug.wartende == 0 and not flug.future.done():
+                    # Niemand wartet mehr: Aufruf beenden, neue Anfragen starten einen neuen
+                    flug.abbruch.set()
+                    if self._laufend.get(schluessel) is flug:
+                        del self._laufend[schluessel]
+
+    def _fliege(self, flug, schluessel, jpegs, api_key, organe):
+        try:
+            # Ein eben beendeter Aufruf kann das Ergebnis inzwischen abgelegt haben
+            ergebnis = self.cache.hole(schluessel)
+            if ergebnis is None:
+                # Was ohnehin nicht rausgeht, soll auch kein Kontingent kosten
+                if flug.abbruch.is_set():
+                    raise PlantNetFehler("Identifikation abgebrochen", gesendet=False)
+                if self.client.schalter.restzeit() > 0:
+                    raise self.client.nicht_erreichbar()
+                self.kontingent.nimm(api_key, flug.abbruch)
+                try:
+                    ergebnis = self.client.identifiziere(jpegs, api_key, organe, abbruch=flug.abbruch)
+                except PlantNetFehler as e:
+                    # Nur beantwortete Client-Fehler (4xx ausser 429) zählt Pl@ntNet mit
+                    if not e.gesendet or e.status is None or e.status == 429 or e.status >= 500:
+                        self.kontingent.erstatte(api_key)
+                    raise
+                self.kontingent.abgleichen(api_key, ergebnis)
+                self.cache.speichere(schluessel, ergebnis)
+            flug.future.set_result(ergebnis)
+        except BaseException as e:
+            flug.future.set_exception(e)
+        finally:
+            with self._laufend_lock:
+                if self._laufend.get(schluessel) is flug:
+                    del self._laufend[schluessel]
+
+    def _erkenne(self, auftrag, daten, api_key):
+        jpeg = bilder.bereite_upload_vor(BytesIO(daten))
+        return self._identifiziere([jpeg], api_key, abbruch=auftrag.abbruch)
+
+    def starte(self, daten, api_key):
+        """Startet die Identifikation eines hochgeladenen Fotos (Rohbytes)"""
+        if not self._plaetze.acquire(blocking=False):
+            raise PlantNetFehler("Gerade laufen zu viele Erkennungen, bitte gleich nochmal versuchen")
+        auftrag = Auftrag()
+        try:
+            auftrag.future = self._pool.submit(self._erkenne, auftrag, daten, api_key)
+        except RuntimeError:
+            self._plaetze.release()
+            raise
+        auftrag.future.add_done_callback(lambda _: self._plaetze.release())
+        return auftrag
+
+    def starte_stapel(self, fotos, api_key, gruppiert=False, parallel=STAPEL_PARALLEL):
+        """Startet die Identifikation mehrerer Fotos (Liste von Rohbytes)
+
+        Einzeln laufen höchstens `parallel` Anfragen dieses Stapels
+        gleichzeitig; gruppiert gehen alle Fotos als Organe einer Pflanze
+        in eine einzige Anfrage.
+        """
+        if len(fotos) > STAPEL_MAX_FOTOS:
+            raise PlantNetFehler(f"Höchstens {STAPEL_MAX_FOTOS} Fotos pro Durchgang")
+        if gruppiert and len(fotos) > MAX_ORGANE:
+            raise PlantNetFehler(f"Höchstens {MAX_ORGANE} Fotos pro Pflanze")
+        if not gruppiert and self.kontingent.knapp(api_key):
+            raise PlantNetFehler("Das Tageskontingent wird knapp, Stapel sind bis morgen pausiert. Einzelfotos gehen weiterhin")
+        if not self._stapel_plaetze.acquire(blocking=False):
+            raise PlantNetFehler("Gerade laufen zu viele Stapel-Erkennungen, bitte gleich nochmal versuchen")
+
+        stapel = Stapelauftrag(1 if gruppiert else len(fotos))
+        threading.Thread(
+            target=self._bearbeite_stapel, args=(stapel, fotos, api_key, gruppiert, parallel),
+            name="plantnet-stapel", daemon=True,
+        ).start()
+        return stapel
+
+    def _bearbeite_stapel(self, stapel, fotos, api_key, gruppiert, parallel):
+        try:
+            vorbereitet = list(self._vorbereitung.map(_vorbereiten, fotos))
+
+            if gruppiert:
+                jpegs = [jpeg for jpeg in vorbereitet if isinstance(jpeg, bytes)]
+                if not jpegs:
+                    stapel._melde(0, fehler="Kein Foto kann verwendet werden")
+                    return
+                try:
+                    stapel._melde(0, ergebnis=self._identifiziere(jpegs, api_key, abbruch=stapel.abbruch))
+                except Exception as e:
+                    stapel._melde(0, fehler=str(e))
+                return
+
+            frei = threading.Semaphore(parallel)
+            gesendet = []
+            for i, jpeg in enumerate(vorbereitet):
+                if isinstance(jpeg, ValueError):
+                    stapel._melde(i, fehler=f"Bild kann nicht verwendet werden: {jpeg}")
+                    continue
+                while not frei.acquire(timeout=0.25) and not stapel.abgebrochen:
+                    pass
+                if stapel.abgebrochen:
+                    break
+                future = self._pool.submit(self._identifiziere, [jpeg], api_key, None, stapel.abbruch)
+                future.add_done_callback(partial(_stapel_ergebnis, stapel, i, frei))
+                gesendet.append(future)
+
+            if stapel.abgebrochen:
+                for future in gesendet:
+                    future.cancel()
+            wait(gesendet)
+        finally:
+            self._stapel_plaetze.release()
+            stapel._fertig.set()
@@ -0,0 +1,443 @@
+"""
+Suchindizes für die Heilkräuter-Datenbank
+
+Die Indizes werden einmal beim Laden der Datenbank aufgebaut und danach nur
+noch gelesen. Suchen kosten dadurch einen Dictionary-Zugriff statt eines
+Durchlaufs über alle Pflanzen.
+"""
+
+import bisect
+import heapq
+import math
+import re
+
+MONATE = ["Januar", "Februar", "März", "April", "Mai", "Juni",
+          "Juli", "August", "September", "Oktober", "November", "Dezember"]
+
+_MONAT_NR = {m: i for i, m in enumerate(MONATE)}
+
+
+class PflanzenIndex:
+    """Invertierter Index: Symptom und Wirkung -> Pflanzen-IDs
+
+    Erntemonate kennt nur der Erntekalender (`Datenbank.kalender`).
+    """
+
+    def __init__(self, pflanzen):
+        self.nach_id = {}
+        symptome = {}
+        wirkungen = {}
+
+        for p in pflanzen:
+            pid = p.id
+            self.nach_id[pid] = p
+            for symptom in p.symptome:
+                symptome.setdefault(symptom, []).append(pid)
+            for wirkung in p.wirkung:
+                wirkungen.setdefault(wirkung, []).append(pid)
+
+        self.symptome = {k: tuple(v) for k, v in symptome.items()}
+        self.wirkungen = {k: tuple(v) for k, v in wirkungen.items()}
+
+        # Sortierte Auswahllisten für die Selectboxen
+        self.alle_symptome = tuple(sorted(self.symptome))
+        self.alle_wirkungen = tuple(sorted(self.wirkungen))
+        self.alle_pflanzennamen = tuple(sorted(p.deutsch for p in pflanzen))
+
+    def _pflanzen(self, ids):
+        return [self.nach_id[pid] for pid in ids]
+
+    def nach_symptom(self, symptom):
+        return self._pflanzen(self.symptome.get(symptom, ()))
+
+    def nach_wirkung(self, wirkung):
+        return self._pflanzen(self.wirkungen.get(wirkung, ()))
+
+
+# Rangstufen unterhalb der Art, die zum Namen gehören (alles andere nach dem
+# Epitheton ist Autorenangabe)
+RANGSTUFEN = {'subsp.': 'subsp.', 'ssp.': 'subsp.', 'var.': 'var.', 'f.': 'f.'}
+
+# Spezifität eines Treffers im NamensAufloeser
+GENAU, ART, GATTUNG = 3, 2, 1
+
+
+def normalisiere_latein(name):
+    """Zerlegt einen wissenschaftlichen Namen in Wörter ohne Autor und Hybridzeichen
+
+    "Mentha × piperita L." -> ['mentha', 'piperita']
+    """
+    teile = [t for t in name.replace('×', ' ').split() if t.lower() != 'x']
+    if not teile:
+        return []
+    woerter = [teile[0].lower()]
+    if len(teile) > 1 and teile[1].islower():
+        woerter.append(teile[1])
+        rest = teile[2:]
+        for rang, naechstes in zip(rest, rest[1:]):
+            if rang in RANGSTUFEN and naechstes.isalpha() and naechstes.islower():
+                woerter += [RANGSTUFEN[rang], naechstes]
+                break
+    return woerter
+
+
+class NamensAufloeser:
+    """Ordnet Pl@ntNet-Artnamen den Pflanzen der Datenbank zu
+
+    Drei vorberechnete Tabellen (vollständiger Name, Art, Gattung), jeweils
+    inklusive Synonymen. Eine Abfrage kostet drei Dictionary-Zugriffe.
+    """
+
+    def __init__(self, pflanzen):
+        self.genau = {}
+        self.art = {}
+        self.gattung = {}
+
+        for p in pflanzen:
+            # "Tilia cordata / Tilia platyphyllos" steht für zwei Arten
+            namen = p.lateinisch.split('/') + list(p.synonyme)
+            for name in namen:
+                woerter = normalisiere_latein(name)
+                if not woerter:
+                    continue
+                self._eintragen(self.genau, ' '.join(woerter), p)
+                if len(woerter) >= 2:
+                    self._eintragen(self.art, ' '.join(woerter[:2]), p)
+                self._eintragen(self.gattung, woerter[0], p)
+
+        for tabelle in (self.genau, self.art, self.gattung):
+            for schluessel, treffer in tabelle.items():
+                tabelle[schluessel] = tuple(treffer)
+
+    @staticmethod
+    def _eintragen(tabelle, schluessel, pflanze):
+        treffer = tabelle.setdefault(schluessel, [])
+        if pflanze not in treffer:
+            treffer.append(pflanze)
+
+    def aufloesen(self, name):
+        """Gibt [(Spezifität, Pflanze), ...] zurück, spezifischste Treffer zuerst"""
+        woerter = normalisiere_latein(name)
+        if not woerter:
+            return []
+
+        ergebnis = []
+        gesehen = set()
+        for stufe, tabelle, schluessel in (
+            (GENAU, self.genau, ' '.join(woerter)),
+            (ART, self.art, ' '.join(woerter[:2]) if len(woerter) >= 2 else None),
+            (GATTUNG, self.gattung, woerter[0]),
+        ):
+            for p in tabelle.get(schluessel, ()):
+                if p.id not in gesehen:
+                    gesehen.add(p.id)
+                    ergebnis.append((stufe, p))
+        return ergebnis
+
+    def beste(self, name):
+        treffer = self.aufloesen(name)
+        return treffer[0] if treffer else (0, None)
+
+
+# Volltextsuche -------------------------------------------------------------
+
+STOPPWOERTER = frozenset("""
+    aber als am an auch auf aus bei bis das dem den der des die ein eine einem
+    einen einer eines es für gegen im in ist ja kein keine mit nach nicht nur
+    oder sehr sich sie so über um und vom von vor wie zu zum zur
+""".split())
+
+# Längste Endungen zuerst; der Stamm behält mindestens 4 Zeichen
+ENDUNGEN = ('ungen', 'heiten', 'keiten', 'ung', 'heit', 'keit',
+            'ern', 'en', 'er', 'es', 'e', 'n', 's')
+
+_UMLAUTE = str.maketrans({'ä': 'a', 'ö': 'o', 'ü': 'u', 'ß': 'ss'})
+
+
+def falte(text):
+    """Kleinschreibung und Umlaut-Faltung: "Übelkeit" und "Uebelkeit" -> "ubelkeit" """
+    text = text.lower().translate(_UMLAUTE)
+    return text.replace('ae', 'a').replace('oe', 'o').replace('ue', 'u')
+
+
+def stamm(wort):
+    for endung in ENDUNGEN:
+        if wort.endswith(endung) and len(wort) - len(endung) >= 4:
+            return wort[:-len(endung)]
+    return wort
+
+
+def tokenisiere(text):
+    woerter = ''.join(c if c.isalnum() else ' ' for c in falte(text)).split()
+    return [stamm(w) for w in woerter if w not in STOPPWOERTER and len(w) > 1]
+
+
+class Volltextindex:
+    """BM25-Index über alle Textfelder der Pflanzen
+
+    Namen, Symptome und Wirkungen zählen mehrfach, damit ein Treffer dort
+    vor einer beiläufigen Erwähnung in der Zubereitung landet.
+    """
+
+    FELDER = {
+        'deutsch': 3, 'lateinisch': 3, 'symptome': 2, 'wirkung': 2,
+        'zubereitung': 1, 'bluete_erntezeit': 1, 'vorkommen': 1,
+        'nebenwirkungen': 1, 'kontraindikationen': 1, 'nahrungsmittel': 1,
+    }
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, pflanzen):
+        self.pflanzen = tuple(pflanzen)
+        postings = {}
+        laengen = []
+
+        for pos, p in enumerate(self.pflanzen):
+            haeufigkeit = {}
+            laenge = 0
+            for feld, gewicht in self.FELDER.items():
+                wert = getattr(p, feld)
+                text = ' '.join(wert) if isinstance(wert, tuple) else wert
+                for term in tokenisiere(text):
+                    haeufigkeit[term] = haeufigkeit.get(term, 0) + gewicht
+                    laenge += gewicht
+            laengen.append(laenge)
+            for term, tf in haeufigkeit.items():
+                postings.setdefault(term, []).append((pos, tf))
+
+        anzahl = len(self.pflanzen)
+        mittel = sum(laengen) / anzahl if anzahl else 1.0
+        # Längennormierung pro Dokument vorberechnen
+        self.norm = tuple(self.K1 * (1 - self.B + self.B * l / mittel) for l in laengen)
+        self.postings = {t: tuple(v) for t, v in postings.items()}
+        self.idf = {
+            t: math.log(1 + (anzahl - len(v) + 0.5) / (len(v) + 0.5))
+            for t, v in self.postings.items()
+        }
+        self.terme = tuple(sorted(self.postings))
+
+    def _expandiere(self, term):
+        """Der Begriff selbst plus alle Terme, die mit ihm beginnen (Komposita)"""
+        start = bisect.bisect_left(self.terme, term)
+        ende = bisect.bisect_right(self.terme, term + '\uffff')
+        return self.terme[start:ende]
+
+    def suche(self, anfrage, limit=10):
+        """Gibt [(Score, Pflanze), ...] absteigend nach BM25-Score zurück
+
+        Höchstens `limit` Treffer; `limit=None` liefert alle.
+        """
+        scores = {}
+        for term in set(tokenisiere(anfrage)):
+            for treffer in self._expandiere(term):
+                # Präfix-Treffer zählen halb, damit exakte Wörter vorne liegen
+                faktor = 1.0 if treffer == term else 0.5
+                idf = self.idf[treffer] * faktor
+                for pos, tf in self.postings[treffer]:
+                    scores[pos] = scores.get(pos, 0.0) + idf * tf * (self.K1 + 1) / (tf + self.norm[pos])
+
+        if limit is None:
+            beste = sorted(scores.items(), key=lambda e: e[1], reverse=True)
+        else:
+            beste = heapq.nlargest(limit, scores.items(), key=lambda e: e[1])
+        return [(score, self.pflanzen[pos]) for pos, score in beste]
+
+
+# Unscharfe Suche -----------------------------------------------------------
+
+def trigramme(text):
+    text = f"  {' '.join(falte(text).split())} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigrammIndex:
+    """Tippfehlertolerante Suche über Pflanzennamen, Symptome und Wirkungen
+
+    Jeder Begriff wird in Trigramme zerlegt. Eine Anfrage zählt nur die
+    Begriffe, die mindestens ein Trigramm mit ihr teilen, statt gegen das
+    ganze Vokabular eine Editierdistanz zu rechnen.
+    """
+
+    ARTEN = ('pflanze', 'symptom', 'wirkung')
+
+    def __init__(self, pflanzen):
+        # Begriff -> (Art, Originaltext, Ziel); Ziel ist die Pflanze bzw. der Begriff selbst
+        eintraege = {}
+        namen = {}
+        for p in pflanzen:
+            namen[p] = [p.deutsch, *p.deutsch.split(' / '), *p.lateinisch.split(' / '), *p.synonyme]
+
+        # Einzelne Namenswörter, damit "Salbai" nicht gegen "Echter Salbei" verliert.
+        # Nur Wörter, die genau eine Pflanze bezeichnen ("Echte", "Plantago" nicht)
+        wort_pflanzen = {}
+        for p, liste in namen.items():
+            for wort in set(re.findall(r'\w{4,}', ' '.join(liste))):
+                wort_pflanzen.setdefault(wort, set()).add(p)
+
+        for p, liste in namen.items():
+            for name in liste:
+                eintraege.setdefault(('pflanze', name), p)
+            for wort in sorted(set(re.findall(r'\w{4,}', ' '.join(liste)))):
+                if len(wort_pflanzen[wort]) == 1:
+                    eintraege.setdefault(('pflanze', wort), p)
+            for symptom in p.symptome:
+                eintraege.setdefault(('symptom', symptom), symptom)
+            for wirkung in p.wirkung:
+                eintraege.setdefault(('wirkung', wirkung), wirkung)
+
+        self.begriffe = tuple((art, text, ziel) for (art, text), ziel in eintraege.items())
+        self.anzahl_trigramme = []
+        postings = {}
+        for nr, (art, text, ziel) in enumerate(self.begriffe):
+            grams = trigramme(text)
+            self.anzahl_trigramme.append(len(grams))
+            for g in grams:
+                postings.setdefault(g, []).append(nr)
+        self.anzahl_trigramme = tuple(self.anzahl_trigramme)
+        self.postings = {g: tuple(v) for g, v in postings.items()}
+
+    def suche(self, anfrage, arten=ARTEN, limit=5, schwelle=0.45):
+        """Gibt [(Score, Art, Begriff, Ziel), ...] zurück, bester Treffer zuerst
+
+        Score ist das Maximum aus Dice-Koeffizient (ähnliche Schreibweise) und
+        Abdeckung der Anfrage (Teilwort, z.B. "Kopfschmerz" in
+        "Spannungskopfschmerzen").
+        """
+        grams = trigramme(anfrage)
+        if len(grams) < 3:
+            return []
+
+        gemeinsam = {}
+        for g in grams:
+            for nr in self.postings.get(g, ()):
+                gemeinsam[nr] = gemeinsam.get(nr, 0) + 1
+
+        ergebnis = []
+        for nr, anzahl in gemeinsam.items():
+            art, text, ziel = self.begriffe[nr]
+            if art not in arten:
+                continue
+            dice = 2 * anzahl / (len(grams) + self.anzahl_trigramme[nr])
+            abdeckung = anzahl / len(grams)
+            # Abdeckung leicht abwerten, damit gleich lange Treffer vorgehen
+            score = max(dice, 0.9 * abdeckung)
+            if score >= schwelle:
+                ergebnis.append((score, art, text, ziel))
+
+        ergebnis.sort(key=lambda e: (-e[0], e[2]))
+        return ergebnis[:limit]
+
+    def beste_pflanze(self, anfrage):
+        treffer = self.suche(anfrage, arten=('pflanze',), limit=1)
+        return treffer[0][3] if treffer else None
+
+
+# Kombinierte Suche ---------------------------------------------------------
+
+# Ausschlussgruppe -> Stichworte (gefaltet) in Kontraindikationen und Nebenwirkungen
+AUSSCHLUSSGRUPPEN = {
+    "Korbblütler-Allergie": ("korbblutler",),
+    "Schwangerschaft": ("schwangerschaft",),
+    "Stillzeit": ("stillzeit",),
+    "Gallenwegserkrankungen": ("galle",),
+    "Lebererkrankungen": ("leber",),
+    "Herz-/Niereninsuffizienz": ("insuffizienz", "nierenversagen"),
+    "Magen-/Darmgeschwüre": ("geschwur",),
+    "Wechselwirkende Medikamente": ("antidepressiva", "antikoagul", "immunsuppress", "antibabypille"),
+}
+
+# Gattung -> Familie für Einträge ohne Feld `familie`. Allergien betreffen
+# ganze Familien, auch wenn die Hinweistexte einer Pflanze sie nicht nennen;
+# darum stehen hier die Korbblütler-Gattungen der europäischen Heilpflanzen.
+FAMILIEN = {
+    'achillea': 'Asteraceae', 'arctium': 'Asteraceae', 'arnica': 'Asteraceae',
+    'artemisia': 'Asteraceae', 'bellis': 'Asteraceae', 'calendula': 'Asteraceae',
+    'centaurea': 'Asteraceae', 'chamaemelum': 'Asteraceae', 'chamomilla': 'Asteraceae',
+    'cichorium': 'Asteraceae', 'cynara': 'Asteraceae', 'echinacea': 'Asteraceae',
+    'eupatorium': 'Asteraceae', 'helichrysum': 'Asteraceae', 'inula': 'Asteraceae',
+    'matricaria': 'Asteraceae', 'petasites': 'Asteraceae', 'silybum': 'Asteraceae',
+    'solidago': 'Asteraceae', 'tanacetum': 'Asteraceae', 'taraxacum': 'Asteraceae',
+    'tussilago': 'Asteraceae',
+}
+
+# Ausschlussgruppe -> Pflanzenfamilien, die zusätzlich zu den Stichworten zählen
+AUSSCHLUSSFAMILIEN = {
+    "Korbblütler-Allergie": ("Asteraceae",),
+}
+
+
+def familien(pflanze):
+    """Familie aus der Datenbank, sonst die der Gattungen in Name und Synonymen"""
+    if pflanze.familie:
+        return {pflanze.familie}
+    ergebnis = set()
+    for name in pflanze.lateinisch.split('/') + list(pflanze.synonyme):
+        woerter = normalisiere_latein(name)
+        if woerter and woerter[0] in FAMILIEN:
+            ergebnis.add(FAMILIEN[woerter[0]])
+    return ergebnis
+
+
+class BitsetIndex:
+    """Jede Pflanzenmenge als Bitmaske (Bit n = n-te Pflanze der Datenbank)
+
+    Eine kombinierte Abfrage ist damit eine Handvoll Integer-Operationen,
+    egal wie gross der Katalog ist. Die Erntemonate kommen als 12-Bit-Masken
+    aus dem Erntekalender, in der Reihenfolge von `pflanzen`.
+    """
+
+    def __init__(self, pflanzen, erntemasken):
+        self.pflanzen = tuple(pflanzen)
+        self.alle = (1 << len(self.pflanzen)) - 1
+        self.symptome = {}
+        self.wirkungen = {}
+        self.monate = {}  # Monatsnummer (0 = Januar) -> Pflanzen
+        self.ausschluesse = {gruppe: 0 for gruppe in AUSSCHLUSSGRUPPEN}
+
+        for pos, p in enumerate(self.pflanzen):
+            bit = 1 << pos
+            for symptom in p.symptome:
+                self.symptome[symptom] = self.symptome.get(symptom, 0) | bit
+            for wirkung in p.wirkung:
+                self.wirkungen[wirkung] = self.wirkungen.get(wirkung, 0) | bit
+            for nr in range(12):
+                if erntemasken[pos] >> nr & 1:
+                    self.monate[nr] = self.monate.get(nr, 0) | bit
+            hinweise = falte(f"{p.kontraindikationen} {p.nebenwirkungen}")
+            pflanzenfamilien = familien(p)
+            for gruppe, stichworte in AUSSCHLUSSGRUPPEN.items():
+                if (any(s in hinweise for s in stichworte)
+                        or pflanzenfamilien.intersection(AUSSCHLUSSFAMILIEN.get(gruppe, ()))):
+                    self.ausschluesse[gruppe] |= bit
+
+    def _verknuepfe(self, tabelle, begriffe, alle):
+        if not begriffe:
+            return self.alle
+        masken = [tabelle.get(b, 0) for b in begriffe]
+        ergebnis = masken[0]
+        for maske in masken[1:]:
+            ergebnis = ergebnis & maske if alle else ergebnis | maske
+        return ergebnis
+
+    def maske(self, symptome=(), wirkungen=(), monate=(), ausschliessen=(), alle=True):
+        """Kategorien werden UND-verknüpft; innerhalb einer Kategorie UND (alle=True) oder ODER
+
+        Monate sind immer ODER-verknüpft (erntbar in mindestens einem der Monate).
+        """
+        ergebnis = (self._verknuepfe(self.symptome, symptome, alle)
+                    & self._verknuepfe(self.wirkungen, wirkungen, alle)
+                    & self._verknuepfe(self.monate, [_MONAT_NR.get(m) for m in monate], False))
+        for gruppe in ausschliessen:
+            ergebnis &= ~self.ausschluesse.get(gruppe, 0)
+        return ergebnis & self.alle
+
+    def pflanzen_aus(self, maske):
+        ergebnis = []
+        while maske:
+            niedrigstes = maske & -maske
+            ergebnis.append(self.pflanzen[niedrigstes.bit_length() - 1])
+            maske ^= niedrigstes
+        return ergebnis
+
+    def abfrage(self, **kriterien):
+        return self.pflanzen_aus(self.maske(**kriterien))
@@ -0,0 +1,209 @@
+"""
+Tests für plantnet.py gegen einen lokalen Stand-in-Server
+
+Der Server beantwortet POST-Anfragen nach einem vorgegebenen Plan
+(Status, Header, Verzögerung), damit Wiederholungen, Timeouts und der
+Schutzschalter ohne Netz und ohne API-Key geprüft werden können.
+
+Ausführen mit: python -m pytest
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+import plantnet
+
+ERGEBNIS = {'results': [{'score': 0.9, 'species': {'scientificNameWithoutAuthor': 'Matricaria chamomilla'}}]}
+
+
+class StandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.plan = []  # (Status, Header, Verzögerung); leer = 200 sofort
+        self.aufrufe = 0
+
+    def handle_error(self, request, client_address):
+        # Abgebrochene Verbindungen nach einem Client-Timeout sind hier erwartet
+        pass
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.server.aufrufe += 1
+        status, header, verzoegerung = self.server.plan.pop(0) if self.server.plan else (200, {}, 0)
+        time.sleep(verzoegerung)
+        body = json.dumps(ERGEBNIS if status == 200 else {'message': 'Fehler'}).encode()
+        self.send_response(status)
+        for name, wert in header.items():
+            self.send_header(name, wert)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = StandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def client_fuer(server, **optionen):
+    optionen.setdefault('timeout', (1, 2))
+    optionen.setdefault('backoff', 0.01)
+    return plantnet.PlantNetClient(f"http://127.0.0.1:{server.server_port}", **optionen)
+
+
+def dienst_fuer(client):
+    return plantnet.Erkennungsdienst(client, plantnet.ErgebnisCache(pfad=None), plantnet.Kontingent(pfad=None))
+
+
+def foto(farbe=(40, 160, 60)):
+    puffer = BytesIO()
+    Image.new('RGB', (64, 64), farbe).save(puffer, 'JPEG')
+    return puffer.getvalue()
+
+
+def warte_bis(bedingung, timeout=5):
+    ende = time.monotonic() + timeout
+    while not bedingung():
+        assert time.monotonic() < ende, "Zeitüberschreitung im Test"
+        time.sleep(0.01)
+
+
+def test_wiederholt_503_bis_zum_erfolg(server):
+    server.plan = [(503, {}, 0), (503, {}, 0), (200, {}, 0)]
+    client = client_fuer(server)
+    assert client.identifiziere([b'jpeg'], 'key') == ERGEBNIS
+    assert server.aufrufe == 3
+    assert client.schalter.fehler_in_folge == 0
+
+
+def test_429_wartet_retry_after_ab(server):
+    server.plan = [(429, {'Retry-After': '1'}, 0), (200, {}, 0)]
+    client = client_fuer(server)
+    start = time.monotonic()
+    assert client.identifiziere([b'jpeg'], 'key') == ERGEBNIS
+    assert time.monotonic() - start >= 0.9
+    assert server.aufrufe == 2
+
+
+def test_4xx_ohne_wiederholung(server):
+    server.plan = [(400, {}, 0), (200, {}, 0)]
+    client = client_fuer(server)
+    with pytest.raises(plantnet.PlantNetFehler) as fehler:
+        client.identifiziere([b'jpeg'], 'key')
+    assert fehler.value.status == 400
+    assert server.aufrufe == 1
+    # Der Dienst hat geantwortet: kein Fehler für den Schutzschalter
+    assert client.schalter.fehler_in_folge == 0
+
+
+def test_lese_timeout(server):
+    server.plan = [(200, {}, 1.0), (200, {}, 1.0)]
+    client = client_fuer(server, timeout=(1, 0.2), versuche=2)
+    with pytest.raises(plantnet.PlantNetFehler, match="Zeitüberschreitung"):
+        client.identifiziere([b'jpeg'], 'key')
+    assert server.aufrufe == 2
+    assert client.schalter.fehler_in_folge == 1
+
+
+def test_schutzschalter_oeffnet_und_erholt_sich_per_probe(server):
+    schalter = plantnet.Schutzschalter(schwelle=2, pause=0.3)
+    client = client_fuer(server, versuche=1, schalter=schalter)
+    server.plan = [(503, {}, 0), (503, {}, 0)]
+    for _ in range(2):
+        with pytest.raises(plantnet.PlantNetFehler):
+            client.identifiziere([b'jpeg'], 'key')
+
+    # Offen: keine Anfrage erreicht den Server
+    with pytest.raises(plantnet.PlantNetFehler, match="vorübergehend nicht erreichbar"):
+        client.identifiziere([b'jpeg'], 'key')
+    assert server.aufrufe == 2
+
+    time.sleep(0.35)
+    assert client.identifiziere([b'jpeg'], 'key') == ERGEBNIS
+    assert server.aufrufe == 3
+    assert schalter.restzeit() == 0.0
+
+
+def test_offener_schutzschalter_kostet_kein_kontingent(server):
+    schalter = plantnet.Schutzschalter(schwelle=1, pause=60)
+    client = client_fuer(server, versuche=1, schalter=schalter)
+    dienst = dienst_fuer(client)
+    server.plan = [(503, {}, 0)]
+
+    # Ein 5xx ist keine Identifikation, der Aufruf wird erstattet
+    with pytest.raises(plantnet.PlantNetFehler):
+        dienst.starte(foto(), 'key').ergebnis()
+    assert dienst.kontingent.verbraucht('key') == 0
+
+    for i in range(5):
+        with pytest.raises(plantnet.PlantNetFehler, match="vorübergehend nicht erreichbar"):
+            dienst.starte(foto((i * 40, 100, 60)), 'key').ergebnis()
+    assert server.aufrufe == 1
+    assert dienst.kontingent.verbraucht('key') == 0
+
+
+def test_4xx_zaehlt_zum_kontingent(server):
+    server.plan = [(404, {}, 0)]
+    dienst = dienst_fuer(client_fuer(server))
+    with pytest.raises(plantnet.PlantNetFehler):
+        dienst.starte(foto(), 'key').ergebnis()
+    assert dienst.kontingent.verbraucht('key') == 1
+    assert dienst.starte(foto((10, 20, 30)), 'key').ergebnis() == ERGEBNIS
+    assert dienst.kontingent.verbraucht('key') == 2
+
+
+def test_abbruch_trifft_nur_die_eigene_anfrage(server):
+    # Erste Anfrage hängt im Backoff, die zweite zum selben Foto hängt sich an
+    server.plan = [(503, {'Retry-After': '1'}, 0), (200, {}, 0)]
+    client = client_fuer(server)
+    dienst = dienst_fuer(client)
+    daten = foto()
+
+    erster = dienst.starte(daten, 'key')
+    warte_bis(lambda: server.aufrufe == 1)
+    zweiter = dienst.starte(daten, 'key')
+    time.sleep(0.1)
+    erster.abbrechen()
+
+    assert zweiter.future.result(timeout=5) == ERGEBNIS
+    with pytest.raises(plantnet.PlantNetFehler, match="abgebrochen"):
+        erster.ergebnis()
+    assert server.aufrufe == 2
+    assert client.schalter.fehler_in_folge == 0
+
+
+def test_abbruch_aller_wartenden_beendet_den_aufruf(server):
+    server.plan = [(503, {'Retry-After': '2'}, 0)]
+    client = client_fuer(server)
+    dienst = dienst_fuer(client)
+    daten = foto((200, 180, 20))
+
+    auftrag = dienst.starte(daten, 'key')
+    warte_bis(lambda: server.aufrufe == 1)
+    auftrag.abbrechen()
+    warte_bis(lambda: not dienst._laufend)
+
+    # Kein Fehler für den Schutzschalter, die nächste Anfrage startet neu
+    assert client.schalter.fehler_in_folge == 0
+    assert dienst.starte(daten, 'key').future.result(timeout=5) == ERGEBNIS
+    assert server.aufrufe == 2
@@ -0,0 +1,62 @@
+"""
+Tests für die Suchindizes in suche.py
+
+Ausführen mit: python -m pytest
+"""
+
+import pytest
+
+import datenbank
+import suche
+
+
+@pytest.fixture(scope='module')
+def db():
+    with open(datenbank.DB_PFAD, 'rb') as f:
+        return datenbank.baue_datenbank(f.read())
+
+
+def test_jede_pflanze_hat_eine_familie(db):
+    # Sonst würde eine neue Pflanze bei Familien-Ausschlüssen stillschweigend übersehen
+    ohne = [p.lateinisch for p in db.pflanzen if not p.familie]
+    assert ohne == []
+
+
+def test_familie_ohne_feld_aus_der_gattung(db):
+    loewenzahn = next(p for p in db.pflanzen if p.lateinisch == 'Taraxacum officinale')
+    felder = {name: getattr(loewenzahn, name) for name in datenbank.Pflanze.__slots__}
+    felder['familie'] = ''
+    assert suche.familien(datenbank.Pflanze(**felder)) == {'Asteraceae'}
+
+
+def test_korbbluetler_allergie_schliesst_alle_asteraceae_aus(db):
+    uebrig = db.bitsets.abfrage(ausschliessen=["Korbblütler-Allergie"])
+    korbbluetler = [p for p in db.pflanzen if 'Asteraceae' in suche.familien(p)]
+    assert korbbluetler
+    assert not [p.lateinisch for p in korbbluetler if p in uebrig]
+    # Nennen "Korbblütler" in keinem Hinweistext, sind aber welche
+    lateinisch = {p.lateinisch for p in korbbluetler}
+    assert {'Taraxacum officinale', 'Solidago virgaurea'} <= lateinisch
+
+
+def test_volltext_ohne_limit_liefert_alle_treffer(db):
+    alle = db.volltext.suche("Tee", limit=None)
+    assert len(alle) > 10
+    assert len(db.volltext.suche("Tee")) == 10
+    scores = [score for score, _ in alle]
+    assert scores == sorted(scores, reverse=True)
+
+
+@pytest.mark.parametrize('anfrage, deutsch', [
+    ("Salbai", "Echter Salbei"),
+    ("Baldrain", "Echter Baldrian"),
+    ("Kamile", "Echte Kamille"),
+    ("Urtica dioica", "Große Brennnessel"),
+])
+def test_tippfehler_in_einem_namenswort(db, anfrage, deutsch):
+    assert db.unscharf.beste_pflanze(anfrage).deutsch == deutsch
+
+
+def test_erntemonate_nur_aus_dem_kalender(db):
+    for monat in suche.MONATE:
+        assert db.bitsets.abfrage(monate=[monat]) == db.kalender.nach_monat(monat)